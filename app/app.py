@@ -9,6 +9,7 @@ A web application for tracking Amazon product prices with notifications and tren
 """
 
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+import atexit
 import os
 import sys
 
@@ -18,7 +19,10 @@ sys.path.insert(0, project_root)
 
 from database.models import db, Product, PriceHistory, get_est_now
 from database.db_manager import DatabaseManager
+from database.engine import configure_engine
+from database.migrations import migrate
 from scraper.amazon_scraper import AmazonScraper
+from scraper.single_flight import price_check_flights
 from notifications.slack_notifier import SlackNotifier
 from config.settings import Config
 import plotly.graph_objects as go
@@ -39,6 +43,8 @@ app.config.from_object(Config)
 
 # Initialize database
 db.init_app(app)
+with app.app_context():
+    configure_engine(db.engine)
 
 # Make zip function available in templates
 app.jinja_env.globals.update(zip=zip)
@@ -46,6 +52,8 @@ app.jinja_env.globals.update(zip=zip)
 # Initialize components
 scraper = AmazonScraper()
 slack_notifier = SlackNotifier()
+# Quit shared browsers and save selector stats when the app exits
+atexit.register(scraper.close)
 
 # Initialize and start price scheduler
 from scraper.scheduler import PriceScheduler
@@ -85,9 +93,9 @@ def est_time_filter(dt):
         est_dt = dt.astimezone(EST)
         return est_dt.strftime('%I:%M %p EST')
 
-# Create application context
+# Create or upgrade the database schema
 with app.app_context():
-    db.create_all()
+    migrate(db.engine)
 
 @app.route('/')
 def index():
@@ -95,11 +103,11 @@ def index():
     products = DatabaseManager.get_all_products()
     
     # Add trend data for each product
+    trends = DatabaseManager.get_price_trends([product.id for product in products])
     products_with_trends = []
     for product in products:
-        trend_data = DatabaseManager.get_price_trend(product.id)
         product_dict = product.to_dict()
-        product_dict['trend'] = trend_data
+        product_dict['trend'] = trends[product.id]
         products_with_trends.append(product_dict)
     
     return render_template('index.html', products=products, products_with_trends=products_with_trends)
@@ -226,14 +234,16 @@ def product_detail(product_id):
         return redirect(url_for('index'))
     
     # Get price history and statistics
+    days = request.args.get('days', 30, type=int)
     price_history = DatabaseManager.get_price_history(product_id, days=30)
     stats = DatabaseManager.get_price_statistics(product_id, days=30)
+    resolution, series = DatabaseManager.get_price_series(product_id, days=days)
     
     # Create price chart
     chart_json = None
-    if price_history:
-        dates = [entry.timestamp for entry in reversed(price_history)]
-        prices = [entry.price for entry in reversed(price_history)]
+    if series:
+        dates = [point['timestamp'] for point in reversed(series)]
+        prices = [point['price'] for point in reversed(series)]
         
         fig = go.Figure()
         fig.add_trace(go.Scatter(
@@ -254,8 +264,12 @@ def product_detail(product_id):
                 annotation_text=f"Target: ${product.target_price:.2f}"
             )
         
+        title = f'Price History - {product.name}'
+        if resolution != 'raw':
+            title += f' ({resolution} closing prices)'
+        
         fig.update_layout(
-            title=f'Price History - {product.name}',
+            title=title,
             xaxis_title='Date',
             yaxis_title='Price ($)',
             hovermode='x unified',
@@ -270,44 +284,70 @@ def product_detail(product_id):
                          stats=stats,
                          chart_json=chart_json)
 
+def scrape_and_record(product):
+    """Scrape a product and record its price, sharing any scrape already in flight
+    
+    A scrape in flight is waited on for up to INFLIGHT_WAIT_SECONDS, after
+    which the product is scraped directly.
+    """
+    def scrape():
+        # Scrape current price
+        product_info = scraper.scrape_product(product.amazon_url)
+        
+        # A cached page was already recorded when it was fetched
+        if product_info and product_info.get('price') and not product_info.get('from_cache'):
+            old_price = product.current_price
+            new_price = product_info['price']
+            
+            # Update price in database
+            DatabaseManager.update_product_price(product.id, new_price)
+            
+            # Check for significant price change
+            if old_price and abs(new_price - old_price) / old_price * 100 >= Config.PRICE_CHANGE_THRESHOLD:
+                price_change_percent = ((new_price - old_price) / old_price) * 100
+                if Config.ENABLE_SLACK_NOTIFICATIONS:
+                    slack_notifier.send_price_drop_alert(product, old_price, new_price, price_change_percent)
+            
+            # Check if target price reached
+            if product.target_price and new_price <= product.target_price:
+                if Config.ENABLE_SLACK_NOTIFICATIONS:
+                    slack_notifier.send_target_price_alert(product)
+        
+        return product_info
+    
+    product_info, shared = price_check_flights.do(product.asin, scrape, timeout=Config.INFLIGHT_WAIT_SECONDS)
+    if shared:
+        logger.info(f"Shared in-flight scrape for product {product.id}")
+    return product_info
+
+def check_all_products():
+    """Scrape every active product, returning (updated_count, error_count)"""
+    products = DatabaseManager.get_all_products()
+    updated_count = 0
+    error_count = 0
+    
+    for product in products:
+        try:
+            product_info = scrape_and_record(product)
+            
+            if product_info and product_info.get('price'):
+                updated_count += 1
+            else:
+                error_count += 1
+                logger.warning(f"Could not scrape price for {product.name}")
+                
+        except Exception as e:
+            error_count += 1
+            logger.error(f"Error scraping product {product.id}: {e}")
+    
+    return updated_count, error_count
+
 @app.route('/check_all_prices')
 def check_all_prices():
     """Manually trigger price check for all products"""
     try:
-        products = DatabaseManager.get_all_products()
-        updated_count = 0
-        error_count = 0
-        
-        for product in products:
-            try:
-                # Scrape current price
-                product_info = scraper.scrape_product(product.amazon_url)
-                
-                if product_info and product_info.get('price'):
-                    old_price = product.current_price
-                    new_price = product_info['price']
-                    
-                    # Update price in database
-                    DatabaseManager.update_product_price(product.id, new_price)
-                    updated_count += 1
-                    
-                    # Check for significant price change
-                    if old_price and abs(new_price - old_price) / old_price * 100 >= Config.PRICE_CHANGE_THRESHOLD:
-                        price_change_percent = ((new_price - old_price) / old_price) * 100
-                        if Config.ENABLE_SLACK_NOTIFICATIONS:
-                            slack_notifier.send_price_drop_alert(product, old_price, new_price, price_change_percent)
-                    
-                    # Check if target price reached
-                    if product.target_price and new_price <= product.target_price:
-                        if Config.ENABLE_SLACK_NOTIFICATIONS:
-                            slack_notifier.send_target_price_alert(product)
-                else:
-                    error_count += 1
-                    logger.warning(f"Could not scrape price for {product.name}")
-                    
-            except Exception as e:
-                error_count += 1
-                logger.error(f"Error scraping product {product.id}: {e}")
+        # A check already running from another tab is shared, not repeated
+        (updated_count, error_count), _ = price_check_flights.do('all-products', check_all_products)
         
         if error_count == 0:
             flash(f'Successfully updated prices for all {updated_count} products!', 'success')
@@ -329,28 +369,10 @@ def scrape_now(product_id):
             flash('Product not found!', 'error')
             return redirect(url_for('index'))
         
-        # Scrape current price
-        product_info = scraper.scrape_product(product.amazon_url)
+        product_info = scrape_and_record(product)
         
         if product_info and product_info.get('price'):
-            old_price = product.current_price
-            new_price = product_info['price']
-            
-            # Update price in database
-            DatabaseManager.update_product_price(product_id, new_price)
-            
-            # Check for significant price change
-            if old_price and abs(new_price - old_price) / old_price * 100 >= Config.PRICE_CHANGE_THRESHOLD:
-                price_change_percent = ((new_price - old_price) / old_price) * 100
-                if Config.ENABLE_SLACK_NOTIFICATIONS:
-                    slack_notifier.send_price_drop_alert(product, old_price, new_price, price_change_percent)
-            
-            # Check if target price reached
-            if product.target_price and new_price <= product.target_price:
-                if Config.ENABLE_SLACK_NOTIFICATIONS:
-                    slack_notifier.send_target_price_alert(product)
-            
-            flash(f'Price updated: ${new_price:.2f}', 'success')
+            flash(f'Price updated: ${product_info["price"]:.2f}', 'success')
         else:
             flash('Could not scrape current price. Please try again later.', 'error')
             
@@ -364,14 +386,15 @@ def scrape_now(product_id):
 def api_products():
     """API endpoint to get all products"""
     products = DatabaseManager.get_all_products()
-    return jsonify([product.to_dict() for product in products])
+    trends = DatabaseManager.get_price_trends([product.id for product in products])
+    return jsonify([dict(product.to_dict(), trend=trends[product.id]) for product in products])
 
 @app.route('/api/product/<int:product_id>/history')
 def api_product_history(product_id):
     """API endpoint to get product price history"""
     days = request.args.get('days', 30, type=int)
-    history = DatabaseManager.get_price_history(product_id, days)
-    return jsonify([entry.to_dict() for entry in history])
+    _, history = DatabaseManager.get_price_series(product_id, days)
+    return jsonify(history)
 
 @app.route('/api/scheduler/status')
 def scheduler_status():
@@ -382,6 +405,18 @@ def scheduler_status():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/scraper/backends')
+def backend_status():
+    """API endpoint to get scraping backend health"""
+    return jsonify(scraper.router.status())
+
+@app.route('/api/scraper/selectors')
+def selector_stats():
+    """API endpoint to inspect per-selector hit/miss counters"""
+    if not scraper.selector_stats:
+        return jsonify({'error': 'Adaptive selectors are disabled'}), 404
+    return jsonify(scraper.selector_stats.snapshot())
+
 @app.route('/api/slack/test')
 def test_slack():
     """Test Slack connection and send a test message"""
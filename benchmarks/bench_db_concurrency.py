@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Database concurrency benchmark for Amazon Price Tracker
+
+Seeds a throwaway SQLite database, then times the queries behind the
+dashboard and product pages while a full scrape cycle writes prices,
+scrape markers and run checkpoints from another thread, the way the
+scheduler does. Each journal mode gets a fresh database.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py                  # Compare default and WAL setups
+    python benchmarks/bench_db_concurrency.py --modes wal      # Benchmark one setup
+    python benchmarks/bench_db_concurrency.py --products 1000 --readers 8
+"""
+
+import sys
+import os
+import argparse
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+
+from config.settings import Config
+from database.db_manager import DatabaseManager, _naive
+from database.engine import configure_engine
+from database.migrations import migrate
+from database.models import db, get_est_now
+
+# 'default' is a plain SQLite engine with rollback journaling
+MODES = ['default', 'wal']
+
+
+def create_app(path, mode):
+    """Create a bare app on a fresh database file"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    if mode == 'wal':
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = Config.SQLALCHEMY_ENGINE_OPTIONS
+    db.init_app(app)
+
+    with app.app_context():
+        if mode == 'wal':
+            configure_engine(db.engine)
+        migrate(db.engine)
+    return app
+
+
+def seed(app, products, history_days):
+    """Add products with a price every 6 hours over `history_days` days"""
+    with app.app_context():
+        now = _naive(get_est_now())
+        product_ids = []
+        for index in range(products):
+            product = DatabaseManager.add_product(
+                f'Product {index}', f'https://www.amazon.com/dp/B{index:09d}', f'B{index:09d}', target_price=20.0
+            )
+            product_ids.append(product.id)
+
+        for step in range(history_days * 4, 0, -1):
+            timestamp = now - timedelta(hours=6 * step)
+            DatabaseManager.record_prices([
+                (product_id, round(random.uniform(15, 30), 2), timestamp) for product_id in product_ids
+            ])
+        return product_ids
+
+
+def scrape_cycle(app, product_ids, batch_size, fetch_delay):
+    """Write one full scrape cycle in batches, returning its duration"""
+    start = time.perf_counter()
+    with app.app_context():
+        run = DatabaseManager.start_scrape_run(product_ids)
+        for offset in range(0, len(product_ids), batch_size):
+            batch = product_ids[offset:offset + batch_size]
+            time.sleep(fetch_delay)
+
+            now = get_est_now()
+            DatabaseManager.record_prices([(product_id, round(random.uniform(15, 30), 2), now) for product_id in batch])
+            DatabaseManager.record_scrape_outcomes({product_id: True for product_id in batch}, scraped_at=now)
+            DatabaseManager.checkpoint_run(run.id, {product_id: 'done' for product_id in batch}, offset + len(batch))
+        DatabaseManager.finish_scrape_run(run.id)
+    return time.perf_counter() - start
+
+
+def read_pages(app, product_ids, stop, latencies, errors):
+    """Load dashboard and product page data until `stop` is set"""
+    with app.app_context():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                if random.random() < 0.5:
+                    products = DatabaseManager.get_all_products()
+                    DatabaseManager.get_price_trends([product.id for product in products])
+                else:
+                    product_id = random.choice(product_ids)
+                    DatabaseManager.get_product_by_id(product_id)
+                    DatabaseManager.get_price_series(product_id, 30)
+                    DatabaseManager.get_price_statistics(product_id, 30)
+            except OperationalError:
+                db.session.rollback()
+                errors.append(time.perf_counter() - start)
+                continue
+            finally:
+                db.session.remove()
+            latencies.append(time.perf_counter() - start)
+
+
+def measure_reads(app, product_ids, readers, writer=None, duration=None):
+    """Run reader threads while `writer` runs, or for `duration` seconds"""
+    stop = threading.Event()
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=read_pages, args=(app, product_ids, stop, latencies, errors))
+        for _ in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    write_seconds = None
+    if writer:
+        write_seconds = writer()
+    else:
+        time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, write_seconds
+
+
+def summarize(latencies, errors):
+    if len(latencies) < 2:
+        return {'reads': len(latencies), 'errors': len(errors), 'p50_ms': 0, 'p95_ms': 0, 'max_ms': 0}
+    cuts = statistics.quantiles(latencies, n=20)
+    return {
+        'reads': len(latencies),
+        'errors': len(errors),
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': cuts[-1] * 1000,
+        'max_ms': max(latencies) * 1000
+    }
+
+
+def run_mode(mode, args):
+    """Benchmark one journal mode on a fresh database"""
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(os.path.join(directory, 'bench.db'), mode)
+        product_ids = seed(app, args.products, args.history_days)
+
+        idle = summarize(*measure_reads(app, product_ids, args.readers, duration=args.idle_seconds)[:2])
+        latencies, errors, write_seconds = measure_reads(
+            app, product_ids, args.readers,
+            writer=lambda: scrape_cycle(app, product_ids, args.batch_size, args.fetch_delay)
+        )
+        busy = summarize(latencies, errors)
+
+        with app.app_context():
+            journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+            db.session.remove()
+            db.engine.dispose()
+    return journal_mode, idle, busy, write_seconds
+
+
+def print_report(results):
+    print(f"\n{'Mode':<10}{'Journal':<10}{'Phase':<8}{'Reads':>8}{'Errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'Cycle s':>10}")
+    print("-" * 84)
+    for mode, (journal_mode, idle, busy, write_seconds) in results.items():
+        for phase, row, seconds in (('idle', idle, ''), ('cycle', busy, f"{write_seconds:.2f}")):
+            print(f"{mode:<10}{journal_mode:<10}{phase:<8}{row['reads']:>8}{row['errors']:>8}"
+                  f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['max_ms']:>10.1f}{seconds:>10}")
+
+
+def main():
+    """Run the database concurrency benchmark"""
+    parser = argparse.ArgumentParser(description='Page query latency during a scrape cycle')
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES, help='Database setups to compare')
+    parser.add_argument('--products', type=int, default=300, help='Tracked products')
+    parser.add_argument('--history-days', type=int, default=30, help='Days of seeded price history')
+    parser.add_argument('--readers', type=int, default=4, help='Concurrent page readers')
+    parser.add_argument('--batch-size', type=int, default=Config.SCRAPE_BATCH_SIZE, help='Products written per batch')
+    parser.add_argument('--fetch-delay', type=float, default=0.05, help='Seconds spent "fetching" each batch')
+    parser.add_argument('--idle-seconds', type=float, default=2, help='Seconds of reads without a writer')
+    args = parser.parse_args()
+
+    random.seed(0)
+    results = {}
+    for mode in args.modes:
+        print(f"Benchmarking {mode} setup...")
+        results[mode] = run_mode(mode, args)
+    print_report(results)
+
+
+if __name__ == '__main__':
+    main()
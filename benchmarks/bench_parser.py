@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Offline parser benchmarks for Amazon Price Tracker
+
+Times the scraper's parsing functions over the saved product pages in
+benchmarks/fixtures and compares the results with benchmarks/baseline.json.
+Only machine-independent results are gated: accuracy, selector evaluations,
+peak memory of pure-Python backends and speed relative to the html.parser
+DOM path timed in the same run.
+
+Usage:
+    python benchmarks/bench_parser.py                      # Run and check for regressions
+    python benchmarks/bench_parser.py --backend lxml       # Benchmark another parser backend
+    python benchmarks/bench_parser.py --adaptive           # Benchmark learned selector ordering
+    python benchmarks/bench_parser.py --update-baseline    # Store the current numbers
+    python benchmarks/bench_parser.py --record URL NAME    # Save a live page to the corpus
+"""
+
+import sys
+import os
+import argparse
+import glob
+import json
+import time
+import tracemalloc
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from scraper.amazon_scraper import AmazonScraper
+from scraper.parsers import PARSER_BACKENDS, get_parser, parse_product_page
+from scraper.selector_stats import SelectorStats
+from config.settings import Config
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+EXPECTED_FILE = os.path.join(FIXTURES_DIR, 'expected.json')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+
+FIELDS = ['name', 'price', 'image_url', 'availability']
+
+ASIN_URLS = [
+    "https://www.amazon.com/dp/B08N5WRWNW",
+    "https://www.amazon.com/gp/product/B08N5WRWNW",
+    "https://www.amazon.com/Something-Product-Name/dp/B08N5WRWNW/ref=sr_1_1",
+    "https://www.amazon.com/s?k=echo+dot&asin=B08N5WRWNW",
+    "https://www.amazon.de/Echo-Dot-Generation/dp/B09B8X9RGM?th=1",
+    "https://www.amazon.com/b?node=17938598011",
+]
+
+PRICE_TEXTS = [
+    "$49.99", "$1,299.00", "54,99 €", "EUR 1.234,56", "£7.50", "¥2,980",
+    "49", "$17.99 - $39.99", "Currently unavailable.", "",
+]
+
+# Throughput is gated relative to this backend's DOM path timed in the same
+# run, so results don't depend on the machine; absolute rates are only reported
+REFERENCE_BACKEND = 'html.parser'
+
+# Backends whose allocations happen in C, out of tracemalloc's sight
+C_BACKENDS = {'lxml'}
+
+# Relative throughput must not drop, memory must not grow, accuracy must not drop
+HIGHER_IS_BETTER = ['dom_vs_reference', 'fast_vs_reference']
+LOWER_IS_BETTER = ['peak_memory_kb']
+# Deterministic for a corpus, so compared exactly
+EXACT_LOWER_IS_BETTER = ['selector_evaluations_per_page']
+
+
+def load_corpus():
+    """Load fixture pages and their expected fields"""
+    with open(EXPECTED_FILE, encoding='utf-8') as f:
+        expected = json.load(f)
+
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, 'rb') as f:
+            pages[name] = f.read()
+
+    return pages, expected
+
+
+def count_correct(result, expected):
+    """Count fields matching the expected values"""
+    if expected is None:
+        return 0
+    return sum(1 for field in FIELDS if result.get(field) == expected.get(field))
+
+
+def time_calls(func, args_list, iterations):
+    """Return calls per second for func over args_list"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for args in args_list:
+            func(*args)
+    elapsed = time.perf_counter() - start
+    return (iterations * len(args_list)) / elapsed if elapsed > 0 else float('inf')
+
+
+class FixedOrderStats(SelectorStats):
+    """Count selector evaluations while keeping the fixed selector order"""
+
+    def ordered(self, field, selectors, pinned=()):
+        return list(selectors)
+
+
+def run_benchmarks(backend, iterations, adaptive=False):
+    """Benchmark one parser backend over the corpus"""
+    scraper = AmazonScraper()
+    # Fresh in-memory stats so selector ordering is learned from the corpus only
+    stats = SelectorStats() if adaptive else FixedOrderStats()
+    scraper.parser = get_parser(backend, stats=stats)
+    pages, expected = load_corpus()
+    reference = get_parser(REFERENCE_BACKEND)
+    trace_memory = backend not in C_BACKENDS
+
+    def reference_path(html):
+        return reference.extract(reference.parse(html))
+
+    def dom_path(html):
+        return scraper._extract_product_info(scraper.parser.parse(html))
+
+    def fast_path(html):
+        return parse_product_page(scraper.parser, html, fast_path=True)
+
+    per_page = []
+    reference_total = dom_total = fast_total = 0.0
+    peak_memory = 0
+    dom_correct = fast_correct = 0
+
+    for name, html in pages.items():
+        # Timed page by page alongside the backend, so both see the same machine load
+        if backend != REFERENCE_BACKEND:
+            reference_total += 1 / time_calls(reference_path, [(html,)], iterations)
+        dom_rate = time_calls(dom_path, [(html,)], iterations)
+        fast_rate = time_calls(fast_path, [(html,)], iterations)
+        dom_total += 1 / dom_rate
+        fast_total += 1 / fast_rate
+
+        peak = None
+        if trace_memory:
+            tracemalloc.start()
+            dom_result = dom_path(html)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peak_memory = max(peak_memory, peak)
+        else:
+            dom_result = dom_path(html)
+
+        fast_result = fast_path(html)
+        page_expected = expected.get(name)
+        dom_correct += count_correct(dom_result, page_expected)
+        fast_correct += count_correct(fast_result, page_expected)
+
+        per_page.append({
+            'page': name,
+            'size_kb': len(html) / 1024,
+            'dom_ms': 1000 / dom_rate,
+            'fast_ms': 1000 / fast_rate,
+            'peak_kb': peak / 1024 if peak is not None else None,
+            'dom_correct': count_correct(dom_result, page_expected),
+            'fast_correct': count_correct(fast_result, page_expected),
+        })
+
+    price_args = [(text,) for text in PRICE_TEXTS]
+    asin_args = [(url,) for url in ASIN_URLS]
+
+    if backend == REFERENCE_BACKEND:
+        reference_total = dom_total
+
+    summary = {
+        'pages': len(pages),
+        'dom_pages_per_sec': len(pages) / dom_total,
+        'fast_pages_per_sec': len(pages) / fast_total,
+        'dom_vs_reference': reference_total / dom_total,
+        'fast_vs_reference': reference_total / fast_total,
+        'parse_price_per_sec': time_calls(scraper._parse_price, price_args, iterations * 100),
+        'extract_asin_per_sec': time_calls(scraper.extract_asin_from_url, asin_args, iterations * 100),
+        'peak_memory_kb': peak_memory / 1024 if trace_memory else None,
+        'selector_evaluations_per_page': stats.snapshot()['avg_evaluations_per_page'],
+        'dom_fields_correct': dom_correct,
+        'fast_fields_correct': fast_correct,
+        'fields_total': len(pages) * len(FIELDS),
+    }
+    return per_page, summary
+
+
+def print_report(backend, per_page, summary):
+    """Print per-page and aggregate results"""
+    print(f"\nParser backend: {backend}")
+    print("-" * 80)
+    print(f"{'Page':<16}{'Size KB':>9}{'DOM ms':>10}{'Fast ms':>10}{'Peak KB':>10}{'DOM ok':>9}{'Fast ok':>9}")
+    for row in per_page:
+        peak = f"{row['peak_kb']:>10.0f}" if row['peak_kb'] is not None else f"{'n/a':>10}"
+        print(f"{row['page']:<16}{row['size_kb']:>9.1f}{row['dom_ms']:>10.2f}{row['fast_ms']:>10.2f}"
+              f"{peak}{row['dom_correct']:>7}/{len(FIELDS)}{row['fast_correct']:>7}/{len(FIELDS)}")
+    print("-" * 80)
+    print(f"DOM path:          {summary['dom_pages_per_sec']:10.1f} pages/sec")
+    print(f"Fast path:         {summary['fast_pages_per_sec']:10.1f} pages/sec")
+    print(f"vs {REFERENCE_BACKEND} DOM:  {summary['dom_vs_reference']:10.2f}x DOM, "
+          f"{summary['fast_vs_reference']:.2f}x fast")
+    print(f"_parse_price:      {summary['parse_price_per_sec']:10.0f} calls/sec")
+    print(f"extract_asin:      {summary['extract_asin_per_sec']:10.0f} calls/sec")
+    if summary['peak_memory_kb'] is not None:
+        print(f"Peak memory:       {summary['peak_memory_kb']:10.0f} KB")
+    else:
+        print(f"Peak memory:       {'n/a':>10} (C allocations aren't traced)")
+    print(f"Selector evals:    {summary['selector_evaluations_per_page']:10.1f} per page")
+    print(f"Fields correct:    DOM {summary['dom_fields_correct']}/{summary['fields_total']}, "
+          f"fast {summary['fast_fields_correct']}/{summary['fields_total']}")
+
+
+def check_regressions(backend, summary, tolerance):
+    """Compare results with the stored baseline, returning a list of failures"""
+    if not os.path.exists(BASELINE_FILE):
+        print("\nNo baseline stored yet - run with --update-baseline")
+        return []
+
+    with open(BASELINE_FILE, encoding='utf-8') as f:
+        baseline = json.load(f).get(backend)
+    if not baseline:
+        print(f"\nNo baseline stored for backend '{backend}'")
+        return []
+
+    failures = []
+    for metric in HIGHER_IS_BETTER:
+        if baseline.get(metric) is not None and summary[metric] < baseline[metric] * (1 - tolerance):
+            failures.append(f"{metric}: {summary[metric]:.2f} < baseline {baseline[metric]:.2f}")
+    for metric in LOWER_IS_BETTER:
+        if baseline.get(metric) is not None and summary[metric] is not None \
+                and summary[metric] > baseline[metric] * (1 + tolerance):
+            failures.append(f"{metric}: {summary[metric]:.1f} > baseline {baseline[metric]:.1f}")
+    for metric in EXACT_LOWER_IS_BETTER:
+        if baseline.get(metric) is not None and round(summary[metric], 2) > baseline[metric]:
+            failures.append(f"{metric}: {summary[metric]:.2f} > baseline {baseline[metric]:.2f}")
+    for metric in ['dom_fields_correct', 'fast_fields_correct']:
+        if metric in baseline and summary[metric] < baseline[metric]:
+            failures.append(f"{metric}: {summary[metric]} < baseline {baseline[metric]}")
+    return failures
+
+
+def update_baseline(backend, summary):
+    """Store the current results as the baseline for a backend"""
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    baseline[backend] = {key: round(value, 2) if isinstance(value, float) else value
+                         for key, value in summary.items()}
+
+    with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=4, sort_keys=True)
+        f.write('\n')
+    print(f"\n✓ Baseline updated for '{backend}'")
+
+
+def record_page(url, name):
+    """Fetch a live product page into the fixture corpus"""
+    scraper = AmazonScraper()
+    response = scraper.session.get(url, timeout=10)
+    response.raise_for_status()
+
+    path = os.path.join(FIXTURES_DIR, f'{name}.html')
+    with open(path, 'wb') as f:
+        f.write(response.content)
+
+    with open(EXPECTED_FILE, encoding='utf-8') as f:
+        expected = json.load(f)
+    expected[name] = scraper._parse_page(response.content)
+    with open(EXPECTED_FILE, 'w', encoding='utf-8') as f:
+        json.dump(expected, f, indent=4, ensure_ascii=False)
+        f.write('\n')
+
+    print(f"✓ Saved {len(response.content) / 1024:.0f} KB to {path}")
+    print(f"  Review the expected fields for '{name}' in {EXPECTED_FILE}")
+
+
+def main():
+    """Run the parser benchmarks"""
+    parser = argparse.ArgumentParser(description='Offline parser benchmarks')
+    parser.add_argument('--backend', default=Config.PARSER_BACKEND, choices=sorted(PARSER_BACKENDS),
+                        help='Parser backend to benchmark')
+    parser.add_argument('--iterations', type=int, default=20, help='Parses per page')
+    parser.add_argument('--adaptive', action='store_true', default=Config.ADAPTIVE_SELECTORS,
+                        help='Order selectors by hit rates learned from the corpus')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed fractional drop in speed relative to the reference backend')
+    parser.add_argument('--update-baseline', action='store_true', help='Store results as the new baseline')
+    parser.add_argument('--record', nargs=2, metavar=('URL', 'NAME'), help='Save a live page as a fixture')
+    args = parser.parse_args()
+
+    if args.record:
+        record_page(*args.record)
+        return
+
+    per_page, summary = run_benchmarks(args.backend, args.iterations, args.adaptive)
+    print_report(args.backend, per_page, summary)
+
+    if args.update_baseline:
+        update_baseline(args.backend, summary)
+        return
+
+    failures = check_regressions(args.backend, summary, args.tolerance)
+    if failures:
+        print("\n✗ Regressions against baseline:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+    print("\n✓ No regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
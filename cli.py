@@ -77,18 +77,22 @@ def list_products():
             print("No products tracked yet")
             return
         
+        trends = DatabaseManager.get_price_trends([product.id for product in products])
+        
         print(f"\nTracked Products ({len(products)}):")
         print("-" * 80)
         
         for product in products:
             current = f"${product.current_price:.2f}" if product.current_price else "N/A"
             target = f"${product.target_price:.2f}" if product.target_price else "None"
+            trend = trends[product.id]
             
             print(f"ID: {product.id}")
             print(f"Name: {product.name}")
             print(f"ASIN: {product.asin}")
             print(f"Current Price: {current}")
             print(f"Target Price: {target}")
+            print(f"Trend: {trend['trend']} ({trend['change']:+.2f}, {trend['change_percent']:+.1f}%)")
             print(f"Updated: {product.updated_at.strftime('%Y-%m-%d %H:%M')}")
             print("-" * 80)
 
@@ -108,7 +112,10 @@ def check_prices():
                 try:
                     product_info = scraper.scrape_product(product.amazon_url)
                     
-                    if product_info and product_info.get('price'):
+                    if product_info and product_info.get('from_cache'):
+                        # Already recorded when the page was fetched
+                        print(f"  Price: ${product_info['price']:.2f} (cached)")
+                    elif product_info and product_info.get('price'):
                         old_price = product.current_price
                         new_price = product_info['price']
                         
@@ -127,10 +134,6 @@ def check_prices():
                         
                 except Exception as e:
                     print(f"  ✗ Error: {e}")
-                
-                # Small delay between products
-                import time
-                time.sleep(2)
             
             print("✓ Price check completed")
             
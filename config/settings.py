@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 import pytz
+from sqlalchemy.pool import QueuePool
 
 # Load environment variables
 load_dotenv()
@@ -13,6 +14,24 @@ class Config:
     # Database settings
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///amazon_tracker.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLITE_WAL = os.getenv('SQLITE_WAL', 'True').lower() == 'true'  # Write-ahead log so reads don't wait for writes
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')  # NORMAL is crash-safe with WAL and syncs less
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))  # Wait this long for a lock before failing
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 20000))  # Page cache per connection
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # Bytes of the file read through mmap
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))  # Connections kept open
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))  # Extra connections allowed under load
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 3600))  # Seconds before a connection is reopened
+    # In-memory SQLite shares a single connection, so it takes no pool options. The
+    # pool class is explicit because older SQLAlchemy defaults file SQLite to NullPool.
+    SQLALCHEMY_ENGINE_OPTIONS = {} if ':memory:' in SQLALCHEMY_DATABASE_URI else {
+        'poolclass': QueuePool,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE
+    }
     
     # Timezone settings
     TIMEZONE = os.getenv('TIMEZONE', 'US/Eastern')  # EST/EDT
@@ -21,7 +40,13 @@ class Config:
     # Scraping settings
     USER_AGENT = os.getenv('USER_AGENT', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
     SCRAPE_INTERVAL_HOURS = int(os.getenv('SCRAPE_INTERVAL_HOURS', 6))
+    SCHEDULING_MODE = os.getenv('SCHEDULING_MODE', 'interval')  # 'interval' (full cycles), 'staggered' or 'adaptive'
     PRICE_CHANGE_THRESHOLD = float(os.getenv('PRICE_CHANGE_THRESHOLD', 5.0))  # Percentage
+    PARSER_BACKEND = os.getenv('PARSER_BACKEND', 'html.parser')  # 'html.parser' (BeautifulSoup) or 'lxml'
+    ADAPTIVE_SELECTORS = os.getenv('ADAPTIVE_SELECTORS', 'False').lower() == 'true'  # Try selectors with the best hit rate first (changes which value some pages yield)
+    SELECTOR_STATS_PATH = os.getenv('SELECTOR_STATS_PATH', 'cache/selector_stats.json')
+    SELECTOR_STATS_SAVE_EVERY = int(os.getenv('SELECTOR_STATS_SAVE_EVERY', 50))  # Pages between saves
+    EMBEDDED_DATA_FAST_PATH = os.getenv('EMBEDDED_DATA_FAST_PATH', 'True').lower() == 'true'  # Read price from page JSON before the DOM
     
     # Slack settings
     SLACK_BOT_TOKEN = os.getenv('SLACK_BOT_TOKEN')
@@ -34,5 +59,65 @@ class Config:
     AMAZON_BASE_URL = 'https://www.amazon.com'
     
     # Rate limiting
-    MIN_SCRAPE_DELAY = 2  # Minimum seconds between requests
-    MAX_SCRAPE_DELAY = 5  # Maximum seconds between requests
+    REQUESTS_PER_MINUTE = float(os.getenv('REQUESTS_PER_MINUTE', 12))  # Per host, across all scrape paths
+    RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', 1))  # Requests allowed back to back after idling
+    RATE_LIMIT_JITTER = float(os.getenv('RATE_LIMIT_JITTER', 0.3))  # Random spread as a fraction of the interval
+    
+    # Response cache
+    HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', 'True').lower() == 'true'
+    HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', 'cache/responses.db')
+    HTTP_CACHE_TTL = int(os.getenv('HTTP_CACHE_TTL', 900))  # Seconds a scrape is reused without revalidation
+    HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', 86400))  # Seconds a scrape can be revalidated
+    HTTP_CACHE_MAX_ENTRIES = int(os.getenv('HTTP_CACHE_MAX_ENTRIES', 5000))  # LRU eviction limit
+    
+    # Streaming fetch
+    STREAMING_FETCH = os.getenv('STREAMING_FETCH', 'True').lower() == 'true'  # Stop downloading once all fields are found
+    STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 64 * 1024))  # Bytes per read
+    STREAM_MAX_BYTES = int(os.getenv('STREAM_MAX_BYTES', 1024 * 1024))  # Bytes scanned before reading the full body
+    
+    # Concurrent fetching
+    MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', 8))  # Requests in flight per cycle
+    MAX_REQUESTS_PER_HOST = int(os.getenv('MAX_REQUESTS_PER_HOST', 4))  # Requests in flight per host
+    SCRAPE_BATCH_SIZE = int(os.getenv('SCRAPE_BATCH_SIZE', 50))  # Products fetched together per batch
+    INFLIGHT_WAIT_SECONDS = int(os.getenv('INFLIGHT_WAIT_SECONDS', 30))  # Longest wait on another caller's scrape before scraping directly
+    # Parser processes for batches, 0 parses in threads. Workers re-import the entry script,
+    # so only enable this with run_dev.py or main.py, which guard app startup.
+    PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', 0))
+    
+    # Price writes
+    PRICE_WRITE_BATCH_SIZE = int(os.getenv('PRICE_WRITE_BATCH_SIZE', 100))  # Prices buffered before a flush
+    PRICE_WRITE_MAX_DELAY = float(os.getenv('PRICE_WRITE_MAX_DELAY', 5))  # Seconds a price may wait in the buffer
+    PRICE_HISTORY_MODE = os.getenv('PRICE_HISTORY_MODE', 'every')  # 'every' scrape gets a row, or only price 'changes'
+    RAW_HISTORY_DAYS = int(os.getenv('RAW_HISTORY_DAYS', 90))  # Raw prices kept before only rollups remain
+    HOURLY_ROLLUP_DAYS = int(os.getenv('HOURLY_ROLLUP_DAYS', 365))  # Hourly rollups kept; daily rollups are kept forever
+    STATS_RECOMPUTE_HOURS = int(os.getenv('STATS_RECOMPUTE_HOURS', 6))  # How often rolling price stats are rebuilt
+    RETENTION_CHUNK_SIZE = int(os.getenv('RETENTION_CHUNK_SIZE', 5000))  # IDs covered per delete during cleanup
+    RETENTION_CHUNK_PAUSE = float(os.getenv('RETENTION_CHUNK_PAUSE', 0.05))  # Seconds other writers get between deletes
+    RETENTION_TIME_BUDGET_SECONDS = int(os.getenv('RETENTION_TIME_BUDGET_SECONDS', 300))  # Per cleanup run, 0 = no limit
+    
+    # Cold history archive
+    ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', 'False').lower() == 'true'  # Move old raw prices into columnar files
+    ARCHIVE_PATH = os.getenv('ARCHIVE_PATH', 'archive')  # One .npy file per product
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 30))  # Raw prices older than this leave the database; RAW_HISTORY_DAYS still applies
+    
+    # Scheduler persistence
+    PERSIST_SCHEDULER_JOBS = os.getenv('PERSIST_SCHEDULER_JOBS', 'True').lower() == 'true'  # Keep jobs in the app database
+    SCHEDULER_COALESCE = os.getenv('SCHEDULER_COALESCE', 'True').lower() == 'true'  # Run missed jobs once, not once per missed run
+    SKIP_SCRAPED_WITHIN_HOURS = float(os.getenv('SKIP_SCRAPED_WITHIN_HOURS', SCRAPE_INTERVAL_HOURS / 2))  # Full cycles skip products scraped this recently
+    SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.getenv('SCHEDULER_MISFIRE_GRACE_SECONDS', 0)) or None  # 0 = always catch up
+    
+    # Per-product scheduling (staggered/adaptive modes)
+    ADAPTIVE_MIN_INTERVAL_HOURS = float(os.getenv('ADAPTIVE_MIN_INTERVAL_HOURS', 1))
+    ADAPTIVE_MAX_INTERVAL_HOURS = float(os.getenv('ADAPTIVE_MAX_INTERVAL_HOURS', 48))
+    VOLATILITY_LOOKBACK_DAYS = int(os.getenv('VOLATILITY_LOOKBACK_DAYS', 14))  # History used to score volatility
+    DISPATCH_INTERVAL_SECONDS = int(os.getenv('DISPATCH_INTERVAL_SECONDS', 60))  # How often due products are picked up
+    PLANNER_SYNC_MINUTES = int(os.getenv('PLANNER_SYNC_MINUTES', 15))  # How often product weights are recomputed
+    
+    # Backend routing
+    BACKEND_HEALTH_WINDOW = int(os.getenv('BACKEND_HEALTH_WINDOW', 20))  # Recent attempts tracked per backend
+    BACKEND_MIN_SUCCESS_RATE = float(os.getenv('BACKEND_MIN_SUCCESS_RATE', 0.3))  # Below this a backend is skipped
+    BACKEND_PROBE_INTERVAL = int(os.getenv('BACKEND_PROBE_INTERVAL', 300))  # Seconds between probes of a skipped backend
+    
+    # Selenium fallback
+    SELENIUM_POOL_SIZE = int(os.getenv('SELENIUM_POOL_SIZE', 2))  # Warm Chrome instances kept
+    SELENIUM_MAX_PAGES_PER_DRIVER = int(os.getenv('SELENIUM_MAX_PAGES_PER_DRIVER', 50))  # Pages before a driver is recycled
@@ -0,0 +1,196 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from itertools import groupby
+
+import numpy as np
+
+from config.settings import Config
+from database.models import db, PriceHistory, expand_runs
+from database.retention import delete_in_chunks
+
+# Archived times count microseconds from this naive EST epoch, like the database
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# History rows read per round trip while exporting
+EXPORT_CHUNK_SIZE = 1000
+
+
+class PriceArchive:
+    """Cold price history in one columnar NumPy file per product
+
+    Each file is an (n, 2) int64 array sorted by time: scrape times as
+    epoch microseconds and prices in cents. Reads memory-map the file and
+    binary-search the time column, so a long range is a sequential scan of
+    two packed columns instead of one ORM object per row.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, product_id):
+        return os.path.join(self.directory, f"{product_id}.npy")
+
+    def product_ids(self):
+        """Get the IDs of products with archived prices"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            int(name[:-4]) for name in os.listdir(self.directory)
+            if name.endswith('.npy') and name[:-4].isdigit()
+        )
+
+    def load(self, product_id, since=None):
+        """Memory-map a product's archived points from `since` on, or None if there are none"""
+        try:
+            points = np.load(self.path(product_id), mmap_mode='r')
+        except FileNotFoundError:
+            return None
+        return points_since(points, since)
+
+    def append(self, product_id, timestamps, prices):
+        """Add a product's points, which must be newer than anything archived
+
+        Points at or before the last archived time are skipped, so exporting
+        the same rows again after an interrupted export is harmless.
+        """
+        points = np.column_stack((
+            np.array([to_epoch(timestamp) for timestamp in timestamps], dtype=np.int64),
+            np.round(np.array(prices, dtype=np.float64) * 100).astype(np.int64)
+        ))
+
+        existing = self._read(product_id)
+        if existing is not None:
+            points = np.concatenate((existing, points[points[:, 0] > existing[-1, 0]]))
+        self._write(product_id, points)
+        return len(points) - (len(existing) if existing is not None else 0)
+
+    def expire(self, before):
+        """Drop archived points older than `before` for every product"""
+        removed = 0
+        for product_id in self.product_ids():
+            points = self._read(product_id)
+            keep = points[points[:, 0] >= to_epoch(before)]
+            if len(keep) == len(points):
+                continue
+            removed += len(points) - len(keep)
+            if len(keep):
+                self._write(product_id, keep)
+            else:
+                os.remove(self.path(product_id))
+        return removed
+
+    def _read(self, product_id):
+        # Writers copy the array, so the file can be replaced while no map is open
+        try:
+            return np.load(self.path(product_id))
+        except FileNotFoundError:
+            return None
+
+    def _write(self, product_id, points):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(product_id)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(points, dtype=np.int64))
+        os.replace(temp_path, path)
+
+
+def to_epoch(timestamp):
+    return (timestamp - EPOCH) // MICROSECOND
+
+
+def from_epoch(value):
+    return EPOCH + int(value) * MICROSECOND
+
+
+def points_since(points, since):
+    """Slice archived points to those from `since` on, or None if there are none"""
+    if points is None:
+        return None
+    if since is not None:
+        points = points[np.searchsorted(points[:, 0], to_epoch(since)):]
+    return points if len(points) else None
+
+
+def summarize(points):
+    """Get (min, max, sum, count, first) prices of archived points, like ProductStats.window"""
+    if points is None:
+        return None
+    cents = points[:, 1]
+    return (
+        int(cents.min()) / 100,
+        int(cents.max()) / 100,
+        int(cents.sum()) / 100,
+        len(cents),
+        int(cents[0]) / 100
+    )
+
+
+def combine_summaries(older, newer):
+    """Merge two (min, max, sum, count, first) summaries of consecutive ranges"""
+    if not older or not older[3]:
+        return newer
+    if not newer or not newer[3]:
+        return older
+    return (
+        min(older[0], newer[0]),
+        max(older[1], newer[1]),
+        older[2] + newer[2],
+        older[3] + newer[3],
+        older[4]
+    )
+
+
+def latest_prices(points, limit=2):
+    """Get the newest `limit` archived (price, timestamp) pairs, newest first"""
+    if points is None:
+        return []
+    return [(int(cents) / 100, from_epoch(timestamp)) for timestamp, cents in points[:-limit - 1:-1]]
+
+
+def to_prices(points):
+    """Get archived points as (timestamp, price) pairs, oldest first"""
+    if points is None:
+        return []
+    return [(from_epoch(timestamp), cents / 100) for timestamp, cents in points.tolist()]
+
+
+def archive_cold_history(archive, before):
+    """Move raw prices last seen before `before` from the database into the archive
+
+    Runs of unchanged prices are archived as one point per scrape. Rows are
+    only deleted once every product's file has been written, in chunks but
+    without a time budget, so no price is left both archived and in the
+    database.
+    """
+    query = db.select(
+        PriceHistory.product_id, PriceHistory.price, PriceHistory.timestamp,
+        PriceHistory.last_seen_at, PriceHistory.observations
+    ).where(PriceHistory.seen_until < before)\
+        .order_by(PriceHistory.product_id, PriceHistory.timestamp, PriceHistory.id)
+    rows = db.session.execute(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+
+    archived = 0
+    for product_id, points in groupby(expand_runs(rows), key=lambda point: point[0]):
+        points = list(points)
+        archived += archive.append(product_id, [point[1] for point in points], [point[2] for point in points])
+
+    deleted, _ = delete_in_chunks(PriceHistory, PriceHistory.seen_until < before)
+    return {'archived': archived, 'deleted': deleted}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_price_archive():
+    """Get the process-wide price archive, or None when archiving is off"""
+    global _shared
+    if not Config.ARCHIVE_ENABLED:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            _shared = PriceArchive(Config.ARCHIVE_PATH)
+        return _shared
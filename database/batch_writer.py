@@ -0,0 +1,76 @@
+import atexit
+import logging
+import threading
+
+from flask import has_app_context
+
+from database.db_manager import DatabaseManager
+from database.models import db, get_est_now
+
+
+class PriceBatchWriter:
+    """Buffer scraped prices and write them in one transaction per batch
+
+    Prices are flushed once `max_batch` are buffered, `max_delay` seconds
+    after the first one was buffered, on `flush()` and on shutdown. A failed
+    flush keeps its rows buffered for the next attempt.
+    """
+
+    def __init__(self, app, max_batch=100, max_delay=5.0):
+        self.app = app
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self.logger = logging.getLogger(__name__)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        atexit.register(self.close)
+
+    def add(self, product_id, price, timestamp=None):
+        """Buffer a scraped price"""
+        with self._lock:
+            self._pending.append((product_id, price, timestamp or get_est_now()))
+            full = len(self._pending) >= self.max_batch
+            if not full and self._timer is None and self.max_delay:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered prices, returning how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not rows:
+                return 0
+
+            try:
+                if has_app_context():
+                    DatabaseManager.record_prices(rows)
+                else:
+                    with self.app.app_context():
+                        DatabaseManager.record_prices(rows)
+            except Exception as e:
+                if has_app_context():
+                    db.session.rollback()
+                self.logger.error(f"Failed to write {len(rows)} prices, will retry: {e}")
+                with self._lock:
+                    self._pending = rows + self._pending
+                return 0
+
+            self.logger.debug(f"Wrote {len(rows)} prices")
+            return len(rows)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def close(self):
+        """Flush anything still buffered"""
+        self.flush()
@@ -1,6 +1,10 @@
-from database.models import db, Product, PriceHistory, get_est_now
+from database.archive import get_price_archive, combine_summaries, latest_prices, points_since, summarize, to_prices
+from database.models import db, Product, PriceHistory, PriceRollupHourly, PriceRollupDaily, ProductStats, ProductScrapeState, ScrapeRun, ScrapeRunItem, expand_runs, get_est_now, run_points
+from database.retention import delete_in_chunks
+from database.rollups import covered_until, pending_buckets, watermark
+from config.settings import Config
+from sqlalchemy import insert, update
 from datetime import datetime, timedelta
-import statistics
 import pytz
 
 # EST timezone
@@ -25,13 +29,27 @@ class DatabaseManager:
     @staticmethod
     def get_all_products():
         """Get all active products"""
-        return Product.query.filter_by(is_active=True).all()
+        return db.session.execute(DatabaseManager._active_products_query()).scalars().all()
+    
+    @staticmethod
+    def _active_products_query():
+        return db.select(Product).filter_by(is_active=True)
     
     @staticmethod
     def get_product_by_id(product_id):
         """Get product by ID"""
         return Product.query.get(product_id)
     
+    @staticmethod
+    def get_products_by_ids(product_ids):
+        """Get active products by ID"""
+        if not product_ids:
+            return []
+        return Product.query.filter(
+            Product.id.in_(product_ids),
+            Product.is_active == True
+        ).all()
+    
     @staticmethod
     def get_product_by_asin(asin):
         """Get product by ASIN"""
@@ -42,17 +60,225 @@ class DatabaseManager:
         """Update current price and add to price history"""
         product = Product.query.get(product_id)
         if product:
-            # Add to price history
-            price_entry = PriceHistory(product_id=product_id, price=new_price)
-            db.session.add(price_entry)
+            DatabaseManager.record_prices([(product_id, new_price, get_est_now())])
+            return product
+        return None
+    
+    @staticmethod
+    def record_prices(prices):
+        """Record (product_id, price, timestamp) entries in one transaction
+        
+        History rows are bulk inserted and each product's current price is
+        set from its latest entry with a single bulk UPDATE. With
+        PRICE_HISTORY_MODE 'changes', unchanged prices extend the product's
+        latest history row instead of adding one.
+        """
+        if not prices:
+            return
+        
+        # Add to price history
+        if Config.PRICE_HISTORY_MODE == 'changes':
+            DatabaseManager._record_price_runs(prices)
+        else:
+            db.session.execute(insert(PriceHistory), [
+                {'product_id': product_id, 'price': price, 'timestamp': timestamp, 'observations': 1}
+                for product_id, price, timestamp in prices
+            ])
+        
+        # Update current price
+        latest = {}
+        for product_id, price, timestamp in sorted(prices, key=lambda entry: entry[2]):
+            latest[product_id] = (price, timestamp)
+        db.session.execute(update(Product), [
+            {'id': product_id, 'current_price': price, 'updated_at': timestamp}
+            for product_id, (price, timestamp) in latest.items()
+        ])
+        
+        DatabaseManager._update_product_stats(prices)
+        db.session.commit()
+    
+    @staticmethod
+    def _record_price_runs(prices):
+        """Extend each product's latest run while its price holds, else start a new run
+        
+        A run last seen before the hourly rollup watermark is already
+        compacted, so it is left as is and the price starts a new run.
+        """
+        compacted_before = watermark(PriceRollupHourly)
+        runs = {}
+        for product_id, rows in DatabaseManager._ranked_history({product_id for product_id, _, _ in prices}).items():
+            _, price, timestamp, last_seen_at, observations, history_id = rows[0]
+            runs[product_id] = {
+                'id': history_id,
+                'product_id': product_id,
+                'price': price,
+                'timestamp': timestamp,
+                'last_seen_at': last_seen_at,
+                'observations': observations or 1
+            }
+        
+        new_runs = []
+        extended = {}
+        for product_id, price, timestamp in sorted(prices, key=lambda entry: _naive(entry[2])):
+            timestamp = _naive(timestamp)
+            run = runs.get(product_id)
+            last_seen = run and (run['last_seen_at'] or run['timestamp'])
+            if (run and run['price'] == price and timestamp >= last_seen and
+                    (compacted_before is None or last_seen >= compacted_before)):
+                run['last_seen_at'] = timestamp
+                run['observations'] += 1
+                if run['id'] is not None:
+                    extended[run['id']] = run
+                continue
+            
+            run = {
+                'id': None,
+                'product_id': product_id,
+                'price': price,
+                'timestamp': timestamp,
+                'last_seen_at': None,
+                'observations': 1
+            }
+            runs[product_id] = run
+            new_runs.append(run)
+        
+        if new_runs:
+            db.session.execute(insert(PriceHistory), [
+                {key: value for key, value in run.items() if key != 'id'} for run in new_runs
+            ])
+        if extended:
+            db.session.execute(update(PriceHistory), [
+                {'id': history_id, 'last_seen_at': run['last_seen_at'], 'observations': run['observations']}
+                for history_id, run in extended.items()
+            ])
+    
+    @staticmethod
+    def _update_product_stats(prices):
+        """Fold newly recorded prices into each product's rolling stats"""
+        product_ids = {product_id for product_id, _, _ in prices}
+        existing = {
+            stats.product_id: stats
+            for stats in ProductStats.query.filter(ProductStats.product_id.in_(product_ids)).all()
+        }
+        
+        now = _naive(get_est_now())
+        for product_id, price, timestamp in sorted(prices, key=lambda entry: _naive(entry[2])):
+            stats = existing.get(product_id)
+            if stats is None:
+                continue
+            timestamp = _naive(timestamp)
+            
+            if stats.last_price_at is None or timestamp >= stats.last_price_at:
+                stats.previous_price = stats.last_price
+                stats.last_price = price
+                stats.last_price_at = timestamp
+            stats.all_time_low = price if stats.all_time_low is None else min(stats.all_time_low, price)
+            stats.price_count = (stats.price_count or 0) + 1
+            
+            for days in ProductStats.STATS_WINDOWS:
+                if timestamp < now - timedelta(days=days):
+                    continue
+                min_price, max_price, price_sum, price_count, first_price = stats.window(days)
+                stats.set_window(
+                    days,
+                    price if min_price is None else min(min_price, price),
+                    price if max_price is None else max(max_price, price),
+                    (price_sum or 0) + price,
+                    (price_count or 0) + 1,
+                    price if first_price is None else first_price
+                )
+        
+        # Products without stats yet get them built from their full history
+        missing = product_ids - set(existing)
+        if missing:
+            DatabaseManager.recompute_product_stats(sorted(missing), commit=False)
+    
+    @staticmethod
+    def recompute_product_stats(product_ids=None, commit=True):
+        """Rebuild rolling stats from price history, for all products by default
+        
+        Products whose history has all been compacted or deleted keep their
+        last known prices, but their 30 and 90 day windows are emptied.
+        """
+        def scoped(query):
+            if product_ids is None:
+                return query
+            return query.where(PriceHistory.product_id.in_(product_ids))
+        
+        now = _naive(get_est_now())
+        totals = db.session.execute(scoped(
+            db.select(PriceHistory.product_id, db.func.sum(PriceHistory.observations), db.func.min(PriceHistory.price))
+            .group_by(PriceHistory.product_id)
+        )).all()
+        latest = DatabaseManager._ranked_prices(product_ids, limit=2)
+        
+        if Config.PRICE_HISTORY_MODE == 'changes':
+            windows = DatabaseManager._window_stats_from_runs(product_ids, now)
+        else:
+            windows = {}
+            for days in ProductStats.STATS_WINDOWS:
+                cutoff_date = now - timedelta(days=days)
+                aggregates = db.session.execute(
+                    DatabaseManager._window_stats_query(cutoff_date, product_ids)
+                ).all()
+                first_prices = DatabaseManager._ranked_prices(product_ids, limit=1, newest_first=False, since=cutoff_date)
+                windows[days] = {
+                    row[0]: tuple(row[1:]) + (first_prices[row[0]][0][0],)
+                    for row in aggregates
+                }
+        
+        archive = get_price_archive()
+        target_ids = product_ids
+        if target_ids is None:
+            target_ids = sorted(
+                {row[0] for row in totals} |
+                set(archive.product_ids() if archive else []) |
+                set(db.session.execute(db.select(ProductStats.product_id)).scalars())
+            )
+        existing = {
+            stats.product_id: stats
+            for stats in ProductStats.query.filter(ProductStats.product_id.in_(target_ids)).all()
+        } if target_ids else {}
+        totals = {row[0]: row[1:] for row in totals}
+        
+        for product_id in target_ids:
+            stats = existing.get(product_id)
+            if stats is None:
+                stats = ProductStats(product_id=product_id)
+                db.session.add(stats)
+            
+            price_count, lowest_price = totals.get(product_id, (0, None))
+            recent = latest.get(product_id, [])
+            window_stats = {days: windows[days].get(product_id) for days in ProductStats.STATS_WINDOWS}
+            
+            archived = archive.load(product_id) if archive is not None else None
+            if archived is not None:
+                archived_low, _, _, archived_count, _ = summarize(archived)
+                price_count = (price_count or 0) + archived_count
+                lowest_price = archived_low if lowest_price is None else min(lowest_price, archived_low)
+                recent = (recent + latest_prices(archived))[:2]
+                for days in ProductStats.STATS_WINDOWS:
+                    window_stats[days] = combine_summaries(
+                        summarize(points_since(archived, now - timedelta(days=days))),
+                        window_stats[days]
+                    )
             
-            # Update current price
-            product.current_price = new_price
-            product.updated_at = get_est_now()
+            if recent:
+                stats.last_price, stats.last_price_at = recent[0]
+                stats.previous_price = recent[1][0] if len(recent) > 1 else None
+            # History cleanup drops old rows, so never raise a known low
+            if stats.all_time_low is not None and lowest_price is not None:
+                lowest_price = min(stats.all_time_low, lowest_price)
+            stats.all_time_low = lowest_price if lowest_price is not None else stats.all_time_low
+            stats.price_count = price_count
             
+            for days in ProductStats.STATS_WINDOWS:
+                stats.set_window(days, *(window_stats[days] or (None, None, 0, 0, None)))
+            stats.recomputed_at = now
+        
+        if commit:
             db.session.commit()
-            return product
-        return None
+        return len(target_ids)
     
     @staticmethod
     def delete_product(product_id):
@@ -66,24 +292,387 @@ class DatabaseManager:
     
     @staticmethod
     def get_price_history(product_id, days=30):
-        """Get price history for a product"""
-        cutoff_date = get_est_now() - timedelta(days=days)
-        return PriceHistory.query.filter(
+        """Get price history for a product, newest first
+        
+        Each entry is a real scrape; a run of unchanged prices shows as its
+        first and last scrape, with the run's other scrapes counted in the
+        last entry's observations.
+        
+        Archived prices follow the database entries as unsaved PriceHistory
+        objects.
+        """
+        cutoff_date = _naive(get_est_now()) - timedelta(days=days)
+        history = DatabaseManager._hot_price_history(product_id, cutoff_date)
+        
+        archive = DatabaseManager._archive_covering(days)
+        if archive is not None:
+            # Archived prices are older than any still in the database
+            for timestamp, price in reversed(to_prices(archive.load(product_id, since=cutoff_date))):
+                history.append(PriceHistory(product_id=product_id, price=price, timestamp=timestamp))
+        return history
+    
+    @staticmethod
+    def _hot_price_history(product_id, cutoff_date):
+        """Get a product's price history still in the database, newest first"""
+        entries = db.session.execute(DatabaseManager._hot_history_query(product_id, cutoff_date)).scalars().all()
+        
+        history = []
+        for entry in entries:
+            if (entry.observations or 1) == 1:
+                history.append(entry)
+                continue
+            # A run of unchanged scrapes shows as its first and last scrape
+            run = (entry.product_id, entry.price, entry.timestamp, entry.last_seen_at, entry.observations)
+            for _, timestamp, price, scrapes in reversed(list(run_points([run], since=cutoff_date))):
+                history.append(PriceHistory(
+                    id=entry.id, product_id=entry.product_id, price=price, timestamp=timestamp, observations=scrapes
+                ))
+        return history
+    
+    @staticmethod
+    def _hot_history_query(product_id, cutoff_date):
+        return db.select(PriceHistory).where(
             PriceHistory.product_id == product_id,
-            PriceHistory.timestamp >= cutoff_date
-        ).order_by(PriceHistory.timestamp.desc()).all()
+            PriceHistory.seen_until >= cutoff_date
+        ).order_by(PriceHistory.timestamp.desc(), PriceHistory.id.desc())
+    
+    @staticmethod
+    def _archive_covering(days):
+        """Get the price archive if it may hold prices from the last `days` days"""
+        if days <= Config.ARCHIVE_AFTER_DAYS:
+            return None
+        return get_price_archive()
+    
+    @staticmethod
+    def history_resolution(days):
+        """Pick the resolution that still covers the last `days` days"""
+        if days <= Config.RAW_HISTORY_DAYS:
+            return 'raw'
+        if days <= Config.HOURLY_ROLLUP_DAYS:
+            return 'hourly'
+        return 'daily'
+    
+    @staticmethod
+    def get_price_series(product_id, days=30):
+        """Get price points for charting, newest first, at a resolution covering the range
+        
+        Returns (resolution, points); rollup points carry open/high/low/close
+        and use the closing price as 'price'. Prices newer than the last
+        compaction are bucketed on the fly, so a rollup series is never
+        missing recent data.
+        """
+        resolution = DatabaseManager.history_resolution(days)
+        if resolution == 'raw':
+            return resolution, [entry.to_dict() for entry in DatabaseManager.get_price_history(product_id, days)]
+        
+        model = PriceRollupHourly if resolution == 'hourly' else PriceRollupDaily
+        cutoff_date = _naive(get_est_now()) - timedelta(days=days)
+        rollups = db.session.execute(DatabaseManager._rollup_query(model, product_id, cutoff_date)).scalars().all()
+        
+        pending_since = max(cutoff_date, covered_until(model, product_id) or cutoff_date)
+        pending = [model(**bucket).to_dict() for bucket in reversed(pending_buckets(product_id, pending_since, model))]
+        return resolution, pending + [rollup.to_dict() for rollup in rollups]
+    
+    @staticmethod
+    def _rollup_query(model, product_id, cutoff_date):
+        return db.select(model).where(
+            model.product_id == product_id,
+            model.bucket_start >= cutoff_date
+        ).order_by(model.bucket_start.desc())
+    
+    @staticmethod
+    def get_recent_prices(product_ids, days=14):
+        """Get recent (timestamp, price) pairs per product, oldest first"""
+        recent_prices = {product_id: [] for product_id in product_ids}
+        if not product_ids:
+            return recent_prices
+        
+        cutoff_date = _naive(get_est_now()) - timedelta(days=days)
+        archive = DatabaseManager._archive_covering(days)
+        if archive is not None:
+            for product_id in product_ids:
+                recent_prices[product_id] = to_prices(archive.load(product_id, since=cutoff_date))
+        
+        rows = db.session.execute(DatabaseManager._history_query(product_ids, since=cutoff_date)).all()
+        for product_id, timestamp, price in expand_runs(rows, since=cutoff_date):
+            recent_prices[product_id].append((timestamp, price))
+        return recent_prices
+    
+    @staticmethod
+    def get_scrape_states(product_ids):
+        """Get scrape markers by product ID"""
+        if not product_ids:
+            return {}
+        states = ProductScrapeState.query.filter(ProductScrapeState.product_id.in_(product_ids)).all()
+        return {state.product_id: state for state in states}
+    
+    @staticmethod
+    def record_scrape_outcomes(outcomes, scraped_at=None, next_due=None):
+        """Update scrape markers from {product_id: success} outcomes
+        
+        `next_due` optionally maps product IDs to their next due time.
+        """
+        next_due = next_due or {}
+        product_ids = set(outcomes) | set(next_due)
+        if not product_ids:
+            return
+        
+        scraped_at = scraped_at or get_est_now()
+        states = DatabaseManager.get_scrape_states(list(product_ids))
+        for product_id in product_ids:
+            state = states.get(product_id)
+            if state is None:
+                state = ProductScrapeState(product_id=product_id, failure_count=0)
+                db.session.add(state)
+            
+            if product_id in outcomes:
+                state.last_scraped_at = scraped_at
+                if outcomes[product_id]:
+                    state.last_success_at = scraped_at
+                    state.failure_count = 0
+                else:
+                    state.failure_count = (state.failure_count or 0) + 1
+            if product_id in next_due:
+                state.next_due_at = next_due[product_id]
+        
+        db.session.commit()
+    
+    @staticmethod
+    def get_resumable_run(since):
+        """Get the latest unfinished run started after `since`, if any"""
+        return ScrapeRun.query.filter(
+            ScrapeRun.status.in_(['running', 'interrupted']),
+            ScrapeRun.started_at >= since
+        ).order_by(ScrapeRun.id.desc()).first()
+    
+    @staticmethod
+    def get_latest_run():
+        """Get the most recent run"""
+        return ScrapeRun.query.order_by(ScrapeRun.id.desc()).first()
+    
+    @staticmethod
+    def start_scrape_run(product_ids, skip_ids=()):
+        """Create a run over the given products, abandoning unfinished ones"""
+        ScrapeRun.query.filter(ScrapeRun.status.in_(['running', 'interrupted'])).update(
+            {'status': 'abandoned', 'finished_at': get_est_now()}, synchronize_session=False
+        )
+        
+        run = ScrapeRun(status='running', total=len(product_ids))
+        db.session.add(run)
+        db.session.flush()
+        
+        skip_ids = set(skip_ids)
+        db.session.bulk_insert_mappings(ScrapeRunItem, [
+            {
+                'run_id': run.id,
+                'product_id': product_id,
+                'status': 'skipped' if product_id in skip_ids else 'pending'
+            }
+            for product_id in sorted(product_ids)
+        ])
+        db.session.commit()
+        return run
+    
+    @staticmethod
+    def get_pending_run_items(run_id):
+        """Get product IDs still to be checked in a run, in cursor order"""
+        rows = db.session.query(ScrapeRunItem.product_id).filter_by(
+            run_id=run_id, status='pending'
+        ).order_by(ScrapeRunItem.product_id).all()
+        return [product_id for product_id, in rows]
+    
+    @staticmethod
+    def checkpoint_run(run_id, statuses, cursor):
+        """Save per-product statuses ({product_id: status}) and advance the cursor"""
+        for status in set(statuses.values()):
+            product_ids = [product_id for product_id, item_status in statuses.items() if item_status == status]
+            ScrapeRunItem.query.filter(
+                ScrapeRunItem.run_id == run_id,
+                ScrapeRunItem.product_id.in_(product_ids)
+            ).update({'status': status}, synchronize_session=False)
+        
+        ScrapeRun.query.filter_by(id=run_id).update({'cursor': cursor}, synchronize_session=False)
+        db.session.commit()
+    
+    @staticmethod
+    def finish_scrape_run(run_id, status='completed'):
+        """Mark a run as finished or interrupted"""
+        values = {'status': status}
+        if status != 'interrupted':
+            values['finished_at'] = get_est_now()
+        ScrapeRun.query.filter_by(id=run_id).update(values, synchronize_session=False)
+        db.session.commit()
+    
+    @staticmethod
+    def get_run_progress(run_id):
+        """Count a run's items by status"""
+        rows = db.session.query(ScrapeRunItem.status, db.func.count(ScrapeRunItem.id)).filter_by(
+            run_id=run_id
+        ).group_by(ScrapeRunItem.status).all()
+        return dict(rows)
+    
+    @staticmethod
+    def delete_old_runs(days=7, deadline=None):
+        """Delete runs started more than `days` ago, with their items
+        
+        Items are deleted in chunks until `deadline`; runs whose items are
+        not all gone yet are kept for the next cleanup.
+        """
+        cutoff_date = get_est_now() - timedelta(days=days)
+        old_run_ids = db.select(ScrapeRun.id).where(ScrapeRun.started_at < cutoff_date)
+        _, complete = delete_in_chunks(ScrapeRunItem, ScrapeRunItem.run_id.in_(old_run_ids), deadline=deadline)
+        if not complete:
+            return 0
+        deleted = ScrapeRun.query.filter(ScrapeRun.started_at < cutoff_date).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
     
     @staticmethod
     def get_price_trend(product_id):
         """Get price trend for a product (last 2 price points)"""
-        recent_prices = PriceHistory.query.filter_by(product_id=product_id)\
-            .order_by(PriceHistory.timestamp.desc()).limit(2).all()
+        return DatabaseManager.get_price_trends([product_id])[product_id]
+    
+    @staticmethod
+    def get_price_trends(product_ids):
+        """Get price trends for many products with a single query"""
+        if not product_ids:
+            return {}
+        
+        # Trend badges read the maintained stats; only products without
+        # stats yet fall back to ranking their history
+        recent_prices = {}
+        for stats in ProductStats.query.filter(ProductStats.product_id.in_(product_ids)).all():
+            if stats.last_price is not None:
+                recent_prices[stats.product_id] = [
+                    price for price in (stats.last_price, stats.previous_price) if price is not None
+                ]
+        
+        missing = [product_id for product_id in product_ids if product_id not in recent_prices]
+        if missing:
+            ranked = DatabaseManager._ranked_prices(missing, limit=2)
+            for product_id in missing:
+                recent_prices[product_id] = [price for price, _ in ranked.get(product_id, [])]
+        
+        return {
+            product_id: DatabaseManager._trend_from_prices(prices)
+            for product_id, prices in recent_prices.items()
+        }
+    
+    @staticmethod
+    def _ranked_prices(product_ids=None, limit=2, newest_first=True, since=None):
+        """Get each product's first `limit` (price, timestamp) scrapes in timestamp order with one query"""
+        prices = {}
+        # Every row holds at least one scrape, so `limit` rows are enough
+        for product_id, rows in DatabaseManager._ranked_history(product_ids, limit, newest_first, since).items():
+            for row in rows:
+                scrapes = [(price, timestamp) for _, timestamp, price in expand_runs([row[:5]], since=since)]
+                if newest_first:
+                    scrapes.reverse()
+                prices.setdefault(product_id, []).extend(scrapes)
+            prices[product_id] = prices.get(product_id, [])[:limit]
+        return prices
+    
+    @staticmethod
+    def _ranked_history(product_ids=None, limit=1, newest_first=True, since=None):
+        """Get each product's first `limit` history rows in timestamp order with one query
         
+        Rows are (product_id, price, timestamp, last_seen_at, observations, id).
+        """
+        if product_ids is not None and not product_ids:
+            return {}
+        
+        rows = db.session.execute(
+            DatabaseManager._ranked_history_query(product_ids, limit, newest_first, since)
+        ).all()
+        
+        history = {}
+        for row in rows:
+            history.setdefault(row[0], []).append(tuple(row))
+        return history
+    
+    @staticmethod
+    def _ranked_history_query(product_ids=None, limit=1, newest_first=True, since=None):
+        order = (PriceHistory.timestamp.desc(), PriceHistory.id.desc()) if newest_first \
+            else (PriceHistory.timestamp.asc(), PriceHistory.id.asc())
+        ranked = db.select(
+            PriceHistory.product_id,
+            PriceHistory.price,
+            PriceHistory.timestamp,
+            PriceHistory.last_seen_at,
+            PriceHistory.observations,
+            PriceHistory.id,
+            db.func.row_number().over(partition_by=PriceHistory.product_id, order_by=order).label('position')
+        )
+        if product_ids is not None:
+            ranked = ranked.where(PriceHistory.product_id.in_(product_ids))
+        if since is not None:
+            ranked = ranked.where(PriceHistory.seen_until >= since)
+        ranked = ranked.subquery()
+        
+        return db.select(
+            ranked.c.product_id, ranked.c.price, ranked.c.timestamp,
+            ranked.c.last_seen_at, ranked.c.observations, ranked.c.id
+        ).where(ranked.c.position <= limit).order_by(ranked.c.product_id, ranked.c.position)
+    
+    @staticmethod
+    def _history_query(product_ids=None, since=None):
+        """Select (product_id, price, timestamp, last_seen_at, observations) rows in time order"""
+        query = db.select(
+            PriceHistory.product_id, PriceHistory.price, PriceHistory.timestamp,
+            PriceHistory.last_seen_at, PriceHistory.observations
+        )
+        if product_ids is not None:
+            query = query.where(PriceHistory.product_id.in_(product_ids))
+        if since is not None:
+            query = query.where(PriceHistory.seen_until >= since)
+        return query.order_by(PriceHistory.product_id, PriceHistory.timestamp, PriceHistory.id)
+    
+    @staticmethod
+    def _window_stats_from_runs(product_ids, now):
+        """Compute stats windows by expanding history runs into scrapes"""
+        windows = {days: {} for days in ProductStats.STATS_WINDOWS}
+        cutoffs = {days: now - timedelta(days=days) for days in ProductStats.STATS_WINDOWS}
+        rows = db.session.execute(
+            DatabaseManager._history_query(product_ids, since=min(cutoffs.values()))
+            .execution_options(yield_per=1000)
+        )
+        
+        for product_id, timestamp, price in expand_runs(rows, since=min(cutoffs.values())):
+            for days, cutoff_date in cutoffs.items():
+                if timestamp < cutoff_date:
+                    continue
+                current = windows[days].get(product_id)
+                if current is None:
+                    windows[days][product_id] = (price, price, price, 1, price)
+                else:
+                    min_price, max_price, price_sum, price_count, first_price = current
+                    windows[days][product_id] = (
+                        min(min_price, price), max(max_price, price), price_sum + price, price_count + 1, first_price
+                    )
+        return windows
+    
+    @staticmethod
+    def _window_stats_query(cutoff_date, product_ids=None):
+        """Select (product_id, min, max, sum, count) of prices scraped since `cutoff_date`"""
+        query = db.select(
+            PriceHistory.product_id,
+            db.func.min(PriceHistory.price),
+            db.func.max(PriceHistory.price),
+            db.func.sum(PriceHistory.price),
+            db.func.count(PriceHistory.id)
+        ).where(PriceHistory.timestamp >= cutoff_date)
+        if product_ids is not None:
+            query = query.where(PriceHistory.product_id.in_(product_ids))
+        return query.group_by(PriceHistory.product_id)
+    
+    @staticmethod
+    def _trend_from_prices(recent_prices):
+        """Build trend data from a product's latest prices, newest first"""
         if len(recent_prices) < 2:
             return {'trend': 'neutral', 'change': 0, 'change_percent': 0}
         
-        current_price = recent_prices[0].price
-        previous_price = recent_prices[1].price
+        current_price = recent_prices[0]
+        previous_price = recent_prices[1]
         
         change = current_price - previous_price
         change_percent = (change / previous_price) * 100 if previous_price > 0 else 0
@@ -106,25 +695,38 @@ class DatabaseManager:
     @staticmethod
     def get_price_statistics(product_id, days=30):
         """Get price statistics for a product"""
-        history = DatabaseManager.get_price_history(product_id, days)
-        if not history:
+        if days in ProductStats.STATS_WINDOWS:
+            product_stats = ProductStats.query.get(product_id)
+            if product_stats is not None:
+                return DatabaseManager._statistics_from_stats(product_stats, days)
+        
+        cutoff_date = _naive(get_est_now()) - timedelta(days=days)
+        prices = [entry.price for entry in DatabaseManager._hot_price_history(product_id, cutoff_date)]
+        window = None
+        if prices:
+            window = (min(prices), max(prices), sum(prices), len(prices), prices[-1])
+        
+        # Archived prices are summarized on the mapped columns, not per entry
+        archive = DatabaseManager._archive_covering(days)
+        archived = archive.load(product_id, since=cutoff_date) if archive is not None else None
+        window = combine_summaries(summarize(archived), window)
+        if not window:
             return None
         
-        prices = [entry.price for entry in history]
-        current_price = prices[0] if prices else 0
+        min_price, max_price, price_sum, price_count, first_price = window
+        current_price = prices[0] if prices else latest_prices(archived, 1)[0][0]
         
         stats = {
             'current_price': current_price,
-            'min_price': min(prices),
-            'max_price': max(prices),
-            'avg_price': statistics.mean(prices),
-            'price_points': len(prices),
+            'min_price': min_price,
+            'max_price': max_price,
+            'avg_price': price_sum / price_count,
+            'price_points': price_count,
             'days_tracked': days
         }
         
         # Calculate price change from first recorded price
-        if len(prices) > 1:
-            first_price = prices[-1]
+        if price_count > 1:
             price_change = current_price - first_price
             price_change_percent = (price_change / first_price) * 100
             stats['price_change'] = price_change
@@ -134,3 +736,37 @@ class DatabaseManager:
             stats['price_change_percent'] = 0
             
         return stats
+    
+    @staticmethod
+    def _statistics_from_stats(product_stats, days):
+        """Build get_price_statistics output from maintained stats"""
+        min_price, max_price, price_sum, price_count, first_price = product_stats.window(days)
+        if not price_count:
+            return None
+        
+        current_price = product_stats.last_price
+        stats = {
+            'current_price': current_price,
+            'min_price': min_price,
+            'max_price': max_price,
+            'avg_price': price_sum / price_count,
+            'price_points': price_count,
+            'days_tracked': days,
+            'all_time_low': product_stats.all_time_low
+        }
+        
+        # Calculate price change from first recorded price
+        if price_count > 1 and first_price:
+            price_change = current_price - first_price
+            stats['price_change'] = price_change
+            stats['price_change_percent'] = (price_change / first_price) * 100
+        else:
+            stats['price_change'] = 0
+            stats['price_change_percent'] = 0
+        
+        return stats
+
+
+def _naive(timestamp):
+    """Drop the timezone from an EST timestamp, as stored in the database"""
+    return timestamp.replace(tzinfo=None) if timestamp and timestamp.tzinfo else timestamp
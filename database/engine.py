@@ -0,0 +1,39 @@
+from sqlalchemy import event
+
+from config.settings import Config
+
+
+def sqlite_pragmas():
+    """Get the pragmas set on every SQLite connection, in order"""
+    pragmas = []
+    if Config.SQLITE_WAL:
+        # Readers keep working while the scheduler writes
+        pragmas.append(('journal_mode', 'WAL'))
+    pragmas += [
+        ('synchronous', Config.SQLITE_SYNCHRONOUS),
+        ('busy_timeout', Config.SQLITE_BUSY_TIMEOUT_MS),
+        ('cache_size', -Config.SQLITE_CACHE_SIZE_KB),  # Negative sizes are in KiB
+        ('mmap_size', Config.SQLITE_MMAP_SIZE)
+    ]
+    return pragmas
+
+
+def configure_engine(engine):
+    """Apply the SQLite pragmas to every connection the engine opens
+
+    Must be called before the engine's first connection. Other databases
+    are left untouched.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
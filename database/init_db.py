@@ -11,20 +11,21 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.app import app
 from database.models import db, Product, PriceHistory
+from database.migrations import migrate, current_version
 
 def init_database():
     """Initialize the database with tables"""
     with app.app_context():
         try:
-            # Create all tables
-            db.create_all()
-            print("✓ Database tables created successfully")
+            # Create or upgrade tables and indexes
+            applied = migrate(db.engine)
+            print(f"✓ Applied {applied} migrations, schema version {current_version(db.engine)}")
             
             # Verify tables exist
             inspector = db.inspect(db.engine)
             tables = inspector.get_table_names()
             
-            expected_tables = ['product', 'price_history']
+            expected_tables = ['product', 'price_history', 'schema_version']
             for table in expected_tables:
                 if table in tables:
                     print(f"✓ Table '{table}' exists")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for Amazon Price Tracker
+
+Each migration runs once, in order, in its own transaction and is recorded in
+the schema_version table, so existing databases can be brought up to date in
+place. Run `python -m database.migrations` to migrate, or add `--check` to
+verify hot queries use indexes.
+"""
+
+import logging
+import re
+import sys
+import os
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from database.models import db, get_est_now, PriceRollupDaily
+
+logger = logging.getLogger(__name__)
+
+schema_version = Table(
+    'schema_version', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register a function(connection) as a schema migration"""
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        return func
+    return register
+
+
+def _create_index(connection, table_name, index_name):
+    """Create an index declared on a model, if it doesn't exist yet"""
+    table = db.metadata.tables[table_name]
+    index = next(index for index in table.indexes if index.name == index_name)
+    index.create(connection, checkfirst=True)
+
+
+def _add_column(connection, table_name, column_name):
+    """Add a column declared on a model, if it doesn't exist yet"""
+    if column_name in {column['name'] for column in inspect(connection).get_columns(table_name)}:
+        return
+    
+    column = db.metadata.tables[table_name].c[column_name]
+    definition = f"{column_name} {column.type.compile(connection.dialect)}"
+    if column.server_default is not None:
+        definition += f" DEFAULT {column.server_default.arg}"
+    if not column.nullable:
+        definition += " NOT NULL"
+    connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {definition}"))
+
+
+@migration(1, 'Baseline schema')
+def _baseline(connection):
+    # Only creates missing tables, so databases made by create_all() are kept
+    db.metadata.create_all(connection)
+
+
+@migration(2, 'Index price history by product and time, products by active flag')
+def _hot_path_indexes(connection):
+    _create_index(connection, 'price_history', 'ix_price_history_product_timestamp')
+    _create_index(connection, 'product', 'ix_product_is_active')
+
+
+@migration(3, 'Hourly and daily price rollups')
+def _price_rollups(connection):
+    for table_name in ('price_rollup_hourly', 'price_rollup_daily'):
+        db.metadata.tables[table_name].create(connection, checkfirst=True)
+
+
+@migration(4, 'Change-only price history runs')
+def _price_history_runs(connection):
+    _add_column(connection, 'price_history', 'last_seen_at')
+    _add_column(connection, 'price_history', 'observations')
+
+
+@migration(5, 'Index rollups by bucket start')
+def _rollup_bucket_indexes(connection):
+    for table_name in ('price_rollup_hourly', 'price_rollup_daily'):
+        _create_index(connection, table_name, f'ix_{table_name}_bucket_start')
+
+
+def current_version(engine):
+    """Get the latest applied migration version, 0 for a new database"""
+    with engine.begin() as connection:
+        schema_version.create(connection, checkfirst=True)
+        version = connection.execute(select(db.func.max(schema_version.c.version))).scalar()
+    return version or 0
+
+
+def migrate(engine):
+    """Apply pending migrations, returning the number applied"""
+    version = current_version(engine)
+    applied = 0
+    for migration_version, description, func in sorted(MIGRATIONS, key=lambda entry: entry[0]):
+        if migration_version <= version:
+            continue
+        with engine.begin() as connection:
+            func(connection)
+            connection.execute(schema_version.insert().values(
+                version=migration_version,
+                description=description,
+                applied_at=get_est_now()
+            ))
+        logger.info(f"Applied migration {migration_version}: {description}")
+        applied += 1
+    return applied
+
+
+# Sample arguments for the hot query plans
+_SAMPLE_IDS = [1, 2, 3]
+_SAMPLE_CUTOFF = datetime(2000, 1, 1)
+
+# DatabaseManager's statements on the scrape, page and stats paths
+HOT_QUERIES = {
+    'active products': DatabaseManager._active_products_query(),
+    'price history': DatabaseManager._hot_history_query(1, _SAMPLE_CUTOFF),
+    'recent prices': DatabaseManager._history_query(_SAMPLE_IDS, since=_SAMPLE_CUTOFF),
+    'latest prices': DatabaseManager._ranked_history_query(_SAMPLE_IDS, limit=2),
+    'price rollups': DatabaseManager._rollup_query(PriceRollupDaily, 1, _SAMPLE_CUTOFF),
+    'window stats': DatabaseManager._window_stats_query(_SAMPLE_CUTOFF, _SAMPLE_IDS),
+}
+
+# A plan step that reads a whole table without an index, e.g. "SCAN price_history"
+_TABLE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+
+
+def check_query_plans(connection):
+    """Get (query name, plan step) pairs for hot queries that scan a table
+    
+    Only SQLite is checked; other databases return no problems.
+    """
+    if connection.dialect.name != 'sqlite':
+        return []
+
+    tables = set(inspect(connection).get_table_names())
+    problems = []
+    for name, statement in HOT_QUERIES.items():
+        sql = statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True})
+        for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"):
+            detail = row[-1]
+            scan = _TABLE_SCAN.match(detail)
+            # Subqueries are scanned under their alias, e.g. "SCAN anon_1"
+            if scan and scan.group(1) in tables:
+                problems.append((name, detail))
+    return problems
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    from app.app import app
+
+    with app.app_context():
+        engine = db.engine
+        applied = migrate(engine)
+        print(f"✓ Applied {applied} migrations, schema version {current_version(engine)}")
+
+        if '--check' in sys.argv:
+            with engine.connect() as connection:
+                problems = check_query_plans(connection)
+            for name, detail in problems:
+                print(f"✗ {name}: {detail}")
+            if problems:
+                sys.exit(1)
+            print("✓ Hot queries use indexes")
+
+
+if __name__ == '__main__':
+    main()
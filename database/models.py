@@ -1,4 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import declared_attr
 from datetime import datetime
 import pytz
 
@@ -19,12 +21,14 @@ class Product(db.Model):
     target_price = db.Column(db.Float, nullable=True)
     current_price = db.Column(db.Float, nullable=True)
     image_url = db.Column(db.Text, nullable=True)
-    is_active = db.Column(db.Boolean, default=True)
+    is_active = db.Column(db.Boolean, default=True, index=True)
     created_at = db.Column(db.DateTime, default=get_est_now)
     updated_at = db.Column(db.DateTime, default=get_est_now, onupdate=get_est_now)
     
     # Relationship
     price_history = db.relationship('PriceHistory', backref='product', lazy=True, cascade='all, delete-orphan')
+    scrape_state = db.relationship('ProductScrapeState', backref='product', uselist=False, cascade='all, delete-orphan')
+    stats = db.relationship('ProductStats', backref='product', uselist=False, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Product {self.name}>'
@@ -44,10 +48,27 @@ class Product(db.Model):
         }
 
 class PriceHistory(db.Model):
+    __table_args__ = (
+        # History, trend and stats queries filter by product and sort by time
+        db.Index('ix_price_history_product_timestamp', 'product_id', 'timestamp'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
     price = db.Column(db.Float, nullable=False)
-    timestamp = db.Column(db.DateTime, default=get_est_now)
+    timestamp = db.Column(db.DateTime, default=get_est_now)  # First seen
+    
+    # In change-only storage a row is a run of identical scrapes
+    last_seen_at = db.Column(db.DateTime, nullable=True)
+    observations = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    
+    @hybrid_property
+    def seen_until(self):
+        return self.last_seen_at or self.timestamp
+    
+    @seen_until.expression
+    def seen_until(cls):
+        return db.func.coalesce(cls.last_seen_at, cls.timestamp)
     
     def __repr__(self):
         return f'<PriceHistory {self.product_id}: ${self.price}>'
@@ -59,3 +80,188 @@ class PriceHistory(db.Model):
             'price': self.price,
             'timestamp': self.timestamp.isoformat()
         }
+
+def expand_runs(rows, since=None):
+    """Expand price history rows into one (product_id, timestamp, price) per scrape
+    
+    Rows are (product_id, price, timestamp, last_seen_at, observations)
+    ordered by product and time. A run's scrapes are spread evenly between
+    its first-seen and last-confirmed times; with one row per scrape this
+    yields the rows unchanged. Scrapes before `since` are dropped.
+    """
+    for product_id, price, first_seen, last_seen, observations in rows:
+        observations = observations or 1
+        if observations == 1 or last_seen is None:
+            points = [first_seen]
+        else:
+            step = (last_seen - first_seen) / (observations - 1)
+            points = [first_seen + step * index for index in range(observations - 1)] + [last_seen]
+        
+        for timestamp in points:
+            if since is None or timestamp >= since:
+                yield product_id, timestamp, price
+
+def run_points(rows, since=None):
+    """Get the real (product_id, timestamp, price, scrapes) points of price history rows
+    
+    Rows are as for expand_runs. A run yields its first scrape and its last
+    confirmed one, which carries the run's remaining scrapes, so no
+    timestamps are made up and extending a run only moves its last point.
+    Points before `since` are dropped.
+    """
+    for product_id, price, first_seen, last_seen, observations in rows:
+        observations = observations or 1
+        if observations == 1 or last_seen is None:
+            points = [(first_seen, observations)]
+        else:
+            points = [(first_seen, 1), (last_seen, observations - 1)]
+        
+        for timestamp, scrapes in points:
+            if since is None or timestamp >= since:
+                yield product_id, timestamp, price, scrapes
+
+class PriceRollupMixin:
+    """OHLC summary of a product's prices over one time bucket"""
+    id = db.Column(db.Integer, primary_key=True)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    open_price = db.Column(db.Float, nullable=False)
+    high_price = db.Column(db.Float, nullable=False)
+    low_price = db.Column(db.Float, nullable=False)
+    close_price = db.Column(db.Float, nullable=False)
+    price_count = db.Column(db.Integer, nullable=False)
+    
+    @declared_attr
+    def product_id(cls):
+        return db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    
+    @declared_attr
+    def __table_args__(cls):
+        return (
+            db.UniqueConstraint('product_id', 'bucket_start', name=f'uq_{cls.__tablename__}_bucket'),
+            # Finds the compaction watermark without scanning every product
+            db.Index(f'ix_{cls.__tablename__}_bucket_start', 'bucket_start')
+        )
+    
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'price': self.close_price,
+            'open': self.open_price,
+            'high': self.high_price,
+            'low': self.low_price,
+            'close': self.close_price,
+            'count': self.price_count,
+            'timestamp': self.bucket_start.isoformat()
+        }
+
+class PriceRollupHourly(PriceRollupMixin, db.Model):
+    __tablename__ = 'price_rollup_hourly'
+    
+    def __repr__(self):
+        return f'<PriceRollupHourly {self.product_id} {self.bucket_start}>'
+
+class PriceRollupDaily(PriceRollupMixin, db.Model):
+    __tablename__ = 'price_rollup_daily'
+    
+    def __repr__(self):
+        return f'<PriceRollupDaily {self.product_id} {self.bucket_start}>'
+
+class ProductStats(db.Model):
+    """Rolling price aggregates, updated on every price write
+    
+    Windowed values only grow between recomputes, so the recompute job
+    repairs them as old prices leave the 30 and 90 day windows.
+    """
+    STATS_WINDOWS = (30, 90)
+    
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True)
+    last_price = db.Column(db.Float, nullable=True)
+    last_price_at = db.Column(db.DateTime, nullable=True)
+    previous_price = db.Column(db.Float, nullable=True)
+    all_time_low = db.Column(db.Float, nullable=True)
+    price_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    min_price_30d = db.Column(db.Float, nullable=True)
+    max_price_30d = db.Column(db.Float, nullable=True)
+    price_sum_30d = db.Column(db.Float, default=0, nullable=False)
+    price_count_30d = db.Column(db.Integer, default=0, nullable=False)
+    first_price_30d = db.Column(db.Float, nullable=True)
+    
+    min_price_90d = db.Column(db.Float, nullable=True)
+    max_price_90d = db.Column(db.Float, nullable=True)
+    price_sum_90d = db.Column(db.Float, default=0, nullable=False)
+    price_count_90d = db.Column(db.Integer, default=0, nullable=False)
+    first_price_90d = db.Column(db.Float, nullable=True)
+    
+    recomputed_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<ProductStats {self.product_id}>'
+    
+    def window(self, days):
+        """Get (min, max, sum, count, first price) for a 30 or 90 day window"""
+        return tuple(
+            getattr(self, f'{field}_{days}d')
+            for field in ('min_price', 'max_price', 'price_sum', 'price_count', 'first_price')
+        )
+    
+    def set_window(self, days, min_price, max_price, price_sum, price_count, first_price):
+        setattr(self, f'min_price_{days}d', min_price)
+        setattr(self, f'max_price_{days}d', max_price)
+        setattr(self, f'price_sum_{days}d', price_sum)
+        setattr(self, f'price_count_{days}d', price_count)
+        setattr(self, f'first_price_{days}d', first_price)
+
+class ProductScrapeState(db.Model):
+    """Per-product scrape markers, kept so scheduling survives restarts"""
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True)
+    last_scraped_at = db.Column(db.DateTime, nullable=True)
+    last_success_at = db.Column(db.DateTime, nullable=True)
+    failure_count = db.Column(db.Integer, default=0, nullable=False)
+    next_due_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<ProductScrapeState {self.product_id}>'
+    
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'last_scraped_at': self.last_scraped_at.isoformat() if self.last_scraped_at else None,
+            'last_success_at': self.last_success_at.isoformat() if self.last_success_at else None,
+            'failure_count': self.failure_count,
+            'next_due_at': self.next_due_at.isoformat() if self.next_due_at else None
+        }
+
+class ScrapeRun(db.Model):
+    """A full price check cycle, checkpointed so it can resume after a restart"""
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), default='running', nullable=False)  # running, interrupted, completed, abandoned
+    started_at = db.Column(db.DateTime, default=get_est_now)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    cursor = db.Column(db.Integer, nullable=True)  # Last product ID checkpointed
+    total = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Relationship
+    items = db.relationship('ScrapeRunItem', backref='run', lazy=True, cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return f'<ScrapeRun {self.id}: {self.status}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'cursor': self.cursor,
+            'total': self.total
+        }
+
+class ScrapeRunItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('scrape_run.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, done, failed, skipped
+    
+    def __repr__(self):
+        return f'<ScrapeRunItem {self.run_id}/{self.product_id}: {self.status}>'
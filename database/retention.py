@@ -0,0 +1,59 @@
+import logging
+import time
+
+from config.settings import Config
+from database.models import db
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress log lines
+PROGRESS_INTERVAL = 10
+
+
+def deadline_after(seconds):
+    """Get a monotonic deadline `seconds` from now, or None for no limit"""
+    return time.monotonic() + seconds if seconds else None
+
+
+def past_deadline(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def delete_in_chunks(model, *criteria, deadline=None, chunk_size=None, pause=None):
+    """Delete a model's rows matching `criteria` in bounded primary key ranges
+
+    Each range of `chunk_size` IDs is deleted and committed on its own, with
+    a `pause` in between, so the write lock is held briefly and the web app
+    and scrape writes get a turn. Stops early once `deadline` (a
+    time.monotonic() value) passes; the remaining rows still match and are
+    picked up by the next run. Returns (rows deleted, whether it finished).
+    """
+    chunk_size = chunk_size or Config.RETENTION_CHUNK_SIZE
+    pause = Config.RETENTION_CHUNK_PAUSE if pause is None else pause
+    table = model.__tablename__
+
+    first_id, last_id = db.session.execute(
+        db.select(db.func.min(model.id), db.func.max(model.id)).where(*criteria)
+    ).one()
+    db.session.commit()
+    if first_id is None:
+        return 0, True
+
+    deleted = 0
+    last_report = time.monotonic()
+    for start in range(first_id, last_id + 1, chunk_size):
+        if past_deadline(deadline):
+            logger.info(f"Stopped deleting {table} rows at id {start} after {deleted}, time budget used up")
+            return deleted, False
+
+        deleted += model.query.filter(model.id >= start, model.id < start + chunk_size, *criteria)\
+            .delete(synchronize_session=False)
+        db.session.commit()
+
+        if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+            done = (start + chunk_size - first_id) / (last_id + 1 - first_id)
+            logger.info(f"Deleted {deleted} {table} rows so far ({min(done, 1):.0%} of id range)")
+            last_report = time.monotonic()
+        if pause:
+            time.sleep(pause)
+    return deleted, True
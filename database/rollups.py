@@ -0,0 +1,196 @@
+from datetime import timedelta
+
+from database.models import db, PriceHistory, PriceRollupHourly, PriceRollupDaily, run_points
+from database.retention import delete_in_chunks
+
+# Rows inserted per statement when writing rollups
+INSERT_CHUNK_SIZE = 1000
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+
+def hour_start(timestamp):
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(timestamp):
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def roll_up_hourly(until):
+    """Fold raw prices into hourly rollups for every hour completed before `until`
+
+    Runs of unchanged prices are rolled up as their first and last scrapes,
+    weighted by their observations. The writer never extends a run last seen
+    before the watermark, so rebuilding from it counts every scrape once.
+    """
+    start = watermark(PriceRollupHourly)
+    end = hour_start(until)
+    query = db.select(
+        PriceHistory.product_id, PriceHistory.price, PriceHistory.timestamp,
+        PriceHistory.last_seen_at, PriceHistory.observations
+    ).where(PriceHistory.timestamp < end)
+    if start is not None:
+        query = query.where(PriceHistory.seen_until >= start)
+    query = query.order_by(PriceHistory.product_id, PriceHistory.timestamp, PriceHistory.id)
+
+    points = (
+        (product_id, timestamp, price, price, price, price, scrapes)
+        for product_id, timestamp, price, scrapes in run_points(_stream(query), since=start)
+        if timestamp < end
+    )
+    return _replace_buckets(PriceRollupHourly, _fold(points, hour_start), start, end)
+
+
+def roll_up_daily(until):
+    """Fold hourly rollups into daily rollups for every day completed before `until`"""
+    start = watermark(PriceRollupDaily)
+    end = day_start(until)
+    query = db.select(
+        PriceRollupHourly.product_id, PriceRollupHourly.bucket_start,
+        PriceRollupHourly.open_price, PriceRollupHourly.high_price,
+        PriceRollupHourly.low_price, PriceRollupHourly.close_price,
+        PriceRollupHourly.price_count
+    ).where(PriceRollupHourly.bucket_start < end)
+    if start is not None:
+        query = query.where(PriceRollupHourly.bucket_start >= start)
+    query = query.order_by(PriceRollupHourly.product_id, PriceRollupHourly.bucket_start)
+
+    return _replace_buckets(PriceRollupDaily, _fold(_stream(query), day_start), start, end)
+
+
+def covered_until(model, product_id):
+    """Get the end of a product's newest rollup bucket, or None without rollups"""
+    newest = db.session.query(db.func.max(model.bucket_start)).filter(model.product_id == product_id).scalar()
+    if newest is None:
+        return None
+    return newest + (HOUR if model is PriceRollupHourly else DAY)
+
+
+def pending_buckets(product_id, since, model):
+    """Fold a product's prices from `since` into `model`'s buckets on the fly, oldest first
+
+    Rollups are only written by the nightly compaction, so series reads use
+    this for the time after the newest stored bucket. Daily buckets are built
+    from stored hourly rollups where they exist, then from raw prices.
+    """
+    if model is PriceRollupHourly:
+        return list(_fold(_raw_points(product_id, since), hour_start))
+
+    raw_since = max(since, covered_until(PriceRollupHourly, product_id) or since)
+    hourly = db.session.execute(
+        db.select(
+            PriceRollupHourly.product_id, PriceRollupHourly.bucket_start,
+            PriceRollupHourly.open_price, PriceRollupHourly.high_price,
+            PriceRollupHourly.low_price, PriceRollupHourly.close_price,
+            PriceRollupHourly.price_count
+        ).where(
+            PriceRollupHourly.product_id == product_id,
+            PriceRollupHourly.bucket_start >= since,
+            PriceRollupHourly.bucket_start < raw_since
+        ).order_by(PriceRollupHourly.bucket_start)
+    ).all()
+    points = list(hourly) + [
+        (bucket['product_id'], bucket['bucket_start'], bucket['open_price'], bucket['high_price'],
+         bucket['low_price'], bucket['close_price'], bucket['price_count'])
+        for bucket in _fold(_raw_points(product_id, raw_since), hour_start)
+    ]
+    return list(_fold(points, day_start))
+
+
+def compact_history(now, raw_days=90, hourly_days=365, deadline=None):
+    """Roll up completed buckets, then expire raw and hourly rows past retention
+
+    Rows only expire once the next coarser resolution covers them, so no
+    price is dropped without being summarized first. Daily rollups are
+    kept indefinitely. Expired rows are deleted in chunks until `deadline`;
+    'complete' is False when rows were left for the next run.
+    """
+    hourly = roll_up_hourly(now)
+    daily = roll_up_daily(now)
+
+    # Never expire past what has been rolled up
+    raw_cutoff = min(now - timedelta(days=raw_days), hour_start(now))
+    hourly_cutoff = min(now - timedelta(days=hourly_days), day_start(now))
+
+    raw_deleted, raw_complete = delete_in_chunks(
+        PriceHistory, PriceHistory.seen_until < raw_cutoff, deadline=deadline
+    )
+    hourly_deleted, hourly_complete = delete_in_chunks(
+        PriceRollupHourly, PriceRollupHourly.bucket_start < hourly_cutoff, deadline=deadline
+    )
+
+    return {
+        'hourly_buckets': hourly,
+        'daily_buckets': daily,
+        'raw_deleted': raw_deleted,
+        'hourly_deleted': hourly_deleted,
+        'complete': raw_complete and hourly_complete
+    }
+
+
+def _raw_points(product_id, since):
+    """Get a product's raw prices from `since` as single-price points in time order, weighted by scrapes"""
+    query = db.select(
+        PriceHistory.product_id, PriceHistory.price, PriceHistory.timestamp,
+        PriceHistory.last_seen_at, PriceHistory.observations
+    ).where(PriceHistory.product_id == product_id, PriceHistory.seen_until >= since)\
+        .order_by(PriceHistory.timestamp, PriceHistory.id)
+    return (
+        (product_id, timestamp, price, price, price, price, scrapes)
+        for product_id, timestamp, price, scrapes in run_points(db.session.execute(query), since=since)
+    )
+
+
+def watermark(model):
+    """Get the newest bucket, which is rebuilt to pick up late prices"""
+    return db.session.query(db.func.max(model.bucket_start)).scalar()
+
+
+def _stream(query):
+    return db.session.execute(query.execution_options(yield_per=INSERT_CHUNK_SIZE))
+
+
+def _fold(points, bucket_of):
+    """Merge (product_id, time, open, high, low, close, count) points into buckets
+
+    Points must be ordered by product and time.
+    """
+    current = None
+    for product_id, timestamp, open_price, high_price, low_price, close_price, count in points:
+        bucket_start = bucket_of(timestamp)
+        if current and current['product_id'] == product_id and current['bucket_start'] == bucket_start:
+            current['high_price'] = max(current['high_price'], high_price)
+            current['low_price'] = min(current['low_price'], low_price)
+            current['close_price'] = close_price
+            current['price_count'] += count
+            continue
+
+        if current:
+            yield current
+        current = {
+            'product_id': product_id,
+            'bucket_start': bucket_start,
+            'open_price': open_price,
+            'high_price': high_price,
+            'low_price': low_price,
+            'close_price': close_price,
+            'price_count': count
+        }
+    if current:
+        yield current
+
+
+def _replace_buckets(model, buckets, start, end):
+    """Replace a model's buckets in [start, end) in one transaction"""
+    buckets = list(buckets)
+    delete = model.query.filter(model.bucket_start < end)
+    if start is not None:
+        delete = delete.filter(model.bucket_start >= start)
+    delete.delete(synchronize_session=False)
+
+    for offset in range(0, len(buckets), INSERT_CHUNK_SIZE):
+        db.session.execute(db.insert(model), buckets[offset:offset + INSERT_CHUNK_SIZE])
+    db.session.commit()
+    return len(buckets)
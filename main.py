@@ -14,24 +14,19 @@ from flask import Flask
 # Add project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app.app import app
-from scraper.scheduler import PriceScheduler
 from config.settings import Config
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('price_tracker.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-
 logger = logging.getLogger(__name__)
 
 def create_app():
-    """Application factory"""
+    """Application factory
+    
+    The app is imported here rather than at module level, so parser worker
+    processes, which re-import this script, don't boot it.
+    """
+    from app.app import app
+    from scraper.scheduler import PriceScheduler
+    
     # Initialize scheduler
     scheduler = PriceScheduler(app)
     
@@ -49,6 +44,17 @@ def create_app():
 
 def main():
     """Main entry point"""
+    # Setup logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('price_tracker.log'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    
+    app = None
     try:
         # Create application
         app = create_app()
@@ -74,7 +80,7 @@ def main():
         sys.exit(1)
     finally:
         # Cleanup scheduler on exit
-        if hasattr(app, 'scheduler'):
+        if app is not None and hasattr(app, 'scheduler'):
             app.scheduler.stop()
             logger.info("Scheduler stopped")
 
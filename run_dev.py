@@ -12,19 +12,20 @@ project_root = os.path.dirname(os.path.abspath(__file__))
 os.chdir(project_root)
 sys.path.insert(0, project_root)
 
-# Import and run the app
-from app.app import app
-
 if __name__ == '__main__':
+    # Imported here so parser worker processes, which re-import this script, don't boot the app
+    from app.app import app
+    
     print(f"Starting from: {os.getcwd()}")
     print(f"Template folder: {app.template_folder}")
     print(f"Static folder: {app.static_folder}")
     
-    # Create database tables
+    # Create or upgrade database tables
     with app.app_context():
         from database.models import db
-        db.create_all()
-        print("Database tables created/verified")
+        from database.migrations import migrate, current_version
+        migrate(db.engine)
+        print(f"Database schema at version {current_version(db.engine)}")
     
     # Initialize scheduler
     from app.app import price_scheduler
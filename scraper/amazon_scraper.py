@@ -1,17 +1,19 @@
 import requests
-from bs4 import BeautifulSoup
 import re
-import time
-import random
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import os
 from urllib.parse import urlparse, parse_qs
+from config.settings import Config
+from scraper.async_fetcher import NOT_MODIFIED, AsyncFetcher
+from scraper.driver_pool import close_driver_pool, get_driver_pool
+from scraper.http_cache import ResponseCache
+from scraper.parse_pool import ParsePool
+from scraper.rate_limiter import get_rate_limiter
+from scraper.routing import get_backend_router
+from scraper.selector_stats import get_selector_stats
+from scraper.parsers import StreamingExtractor, get_parser, parse_price, parse_product_page
 
 class AmazonScraper:
     def __init__(self):
@@ -25,6 +27,48 @@ class AmazonScraper:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        self.rate_limiter = get_rate_limiter()
+        self.cache = ResponseCache(
+            Config.HTTP_CACHE_PATH,
+            ttl=Config.HTTP_CACHE_TTL,
+            max_age=Config.HTTP_CACHE_MAX_AGE,
+            max_entries=Config.HTTP_CACHE_MAX_ENTRIES
+        ) if Config.HTTP_CACHE_ENABLED else None
+        self.selector_stats = get_selector_stats(
+            Config.SELECTOR_STATS_PATH,
+            save_every=Config.SELECTOR_STATS_SAVE_EVERY
+        ) if Config.ADAPTIVE_SELECTORS else None
+        self.parser = get_parser(Config.PARSER_BACKEND, stats=self.selector_stats)
+        self.parse_pool = ParsePool(
+            Config.PARSER_BACKEND,
+            Config.PARSE_WORKERS,
+            fast_path=Config.EMBEDDED_DATA_FAST_PATH,
+            selector_stats=self.selector_stats
+        ) if Config.PARSE_WORKERS > 0 else None
+        # Early termination relies on the embedded-data scan
+        self.streaming = Config.STREAMING_FETCH and Config.EMBEDDED_DATA_FAST_PATH
+        self.async_fetcher = AsyncFetcher(
+            self.headers,
+            max_concurrency=Config.MAX_CONCURRENT_REQUESTS,
+            per_host_limit=Config.MAX_REQUESTS_PER_HOST,
+            rate_limiter=self.rate_limiter,
+            stream_chunk_size=Config.STREAM_CHUNK_SIZE if self.streaming else None,
+            stream_max_bytes=Config.STREAM_MAX_BYTES
+        )
+        self.router = get_backend_router()
+    
+    @property
+    def driver_pool(self):
+        """The process-wide pool of Chrome drivers"""
+        return get_driver_pool(self.headers['User-Agent'])
+    
+    def close(self):
+        """Release browser and parser resources and save learned selector stats"""
+        close_driver_pool()
+        if self.parse_pool:
+            self.parse_pool.shutdown()
+        if self.selector_stats:
+            self.selector_stats.save()
     
     def extract_asin_from_url(self, url):
         """Extract ASIN from Amazon URL"""
@@ -46,19 +90,33 @@ class AmazonScraper:
         
         return None
     
-    def scrape_with_requests(self, url):
-        """Scrape using requests and BeautifulSoup (faster but may be blocked)"""
+    def scrape_with_requests(self, url, cached=None):
+        """Scrape using requests and BeautifulSoup (faster but may be blocked)
+        
+        A stale cache entry is revalidated with a conditional request. A 304
+        returns the cached product info unflagged: the server confirmed the
+        page is unchanged now, so it counts as a new observation.
+        """
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
+            headers = self.cache.conditional_headers(cached) if self.cache else {}
+            self.rate_limiter.acquire(urlparse(url).netloc)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            if self.streaming:
+                response, product_info = self._fetch_streaming(url, headers)
+            else:
+                response = self.session.get(url, headers=headers, timeout=10)
+                response.raise_for_status()
+                
+                # Extract product info
+                product_info = None if response.status_code == 304 else self._parse_page(response.content)
             
-            # Extract product info
-            product_info = self._extract_product_info(soup)
+            if response.status_code == 304 and cached:
+                # Page unchanged since it was cached
+                self.cache.refresh(self._cache_key(url))
+                return cached['product_info']
             
-            # Add random delay to avoid detection
-            time.sleep(random.uniform(1, 3))
+            if self.cache and product_info and product_info.get('price'):
+                self.cache.put(self._cache_key(url), url, product_info, response.headers)
             
             return product_info
             
@@ -66,24 +124,40 @@ class AmazonScraper:
             print(f"Request scraping failed: {e}")
             return None
     
+    def _fetch_streaming(self, url, headers=None):
+        """Read the page in chunks and stop as soon as every field is found
+        
+        Returns (response, product_info); product_info is None for a 304.
+        """
+        with self.session.get(url, headers=headers, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code == 304:
+                return response, None
+            
+            extractor = StreamingExtractor(max_bytes=Config.STREAM_MAX_BYTES)
+            chunks = response.iter_content(chunk_size=Config.STREAM_CHUNK_SIZE)
+            for chunk in chunks:
+                if extractor.feed(chunk):
+                    # Closing the response drops the rest of the body
+                    return response, extractor.product_info
+                if extractor.exhausted:
+                    break
+            
+            # Fall back to parsing the full body
+            body = extractor.body() + b''.join(chunks)
+        
+        return response, self._parse_page(body)
+    
     def scrape_with_selenium(self, url):
         """Scrape using Selenium (slower but more reliable)"""
         driver = None
+        driver_pool = self.driver_pool
         try:
-            # Setup Chrome options
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument(f'--user-agent={self.headers["User-Agent"]}')
-            
-            # Setup driver
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
+            # Borrow a warm driver from the pool
+            driver = driver_pool.acquire()
             
             # Load page
+            self.rate_limiter.acquire(urlparse(url).netloc)
             driver.get(url)
             
             # Wait for price element to load
@@ -92,8 +166,7 @@ class AmazonScraper:
             )
             
             # Get page source and parse
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            product_info = self._extract_product_info(soup)
+            product_info = self._parse_page(driver.page_source)
             
             return product_info
             
@@ -102,120 +175,139 @@ class AmazonScraper:
             return None
         finally:
             if driver:
-                driver.quit()
+                driver_pool.release(driver)
     
     def scrape_product(self, url):
-        """Main scraping method - tries requests first, then Selenium"""
-        # Try requests first (faster)
-        result = self.scrape_with_requests(url)
+        """Main scraping method - tries requests first, then Selenium
         
-        # If requests fails, try Selenium
-        if not result or not result.get('price'):
-            print("Falling back to Selenium...")
-            result = self.scrape_with_selenium(url)
+        Backends currently being blocked are skipped until their circuit
+        breaker lets a probe through. A fresh cache hit is returned as a
+        copy flagged 'from_cache', as in scrape_many, so callers don't
+        record it as a new price.
+        """
+        cached = self.cache.get(self._cache_key(url)) if self.cache else None
+        if cached and cached['fresh']:
+            return dict(cached['product_info'], from_cache=True)
+        
+        result = None
+        plan = self.router.plan()
+        for backend in plan:
+            if not self.router.allow(backend):
+                # Another request took the probe since the plan was made
+                continue
+            if backend == 'requests':
+                result = self.scrape_with_requests(url, cached=cached)
+            else:
+                if backend != plan[0]:
+                    print("Falling back to Selenium...")
+                result = self.scrape_with_selenium(url)
+                self._cache_result(url, result)
+            
+            self.router.record(backend, self._is_product_page(result))
+            if result and result.get('price'):
+                break
         
         return result
     
-    def _extract_product_info(self, soup):
-        """Extract product information from BeautifulSoup object"""
-        product_info = {
-            'name': None,
-            'price': None,
-            'image_url': None,
-            'availability': None
-        }
-        
-        # Extract product name
-        name_selectors = [
-            '#productTitle',
-            '.product-title',
-            'h1.a-size-large',
-            'h1'
-        ]
-        
-        for selector in name_selectors:
-            element = soup.select_one(selector)
-            if element:
-                product_info['name'] = element.get_text(strip=True)
-                break
+    def scrape_many(self, urls, on_result=None):
+        """Scrape many URLs concurrently, falling back to Selenium per URL
         
-        # Extract price
-        price_selectors = [
-            '.a-price-whole',
-            '.a-offscreen',
-            '.a-price .a-offscreen',
-            '#priceblock_dealprice',
-            '#priceblock_ourprice',
-            '#tp_price_block_total_price_ww',
-            '.a-price-range .a-offscreen'
-        ]
-        
-        for selector in price_selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                price_text = element.get_text(strip=True)
-                price = self._parse_price(price_text)
-                if price:
-                    product_info['price'] = price
-                    break
-            if product_info['price']:
-                break
+        Results served from a fresh cache entry are new copies flagged
+        'from_cache', since they are not a new observation of the page.
+        Stale entries are revalidated with a conditional request, like
+        scrape_product does, and a 304 counts as a new observation.
+        URLs aren't sent to a backend whose circuit breaker is holding
+        them back. `on_result(url, product_info)` is called for each URL as
+        soon as its result is final, before the whole batch is.
+        """
+        on_result = on_result or (lambda url, product_info: None)
+        results = {}
+        stale = {}
+        for url in urls:
+            cached = self.cache.get(self._cache_key(url)) if self.cache else None
+            if cached and cached['fresh']:
+                results[url] = dict(cached['product_info'], from_cache=True)
+                on_result(url, results[url])
+            elif cached:
+                stale[url] = cached
         
-        # Extract main product image
-        image_selectors = [
-            '#landingImage',
-            '.a-dynamic-image',
-            '#imgBlkFront',
-            '.item-image-canvas img'
-        ]
-        
-        for selector in image_selectors:
-            element = soup.select_one(selector)
-            if element:
-                image_url = element.get('src') or element.get('data-src')
-                if image_url:
-                    product_info['image_url'] = image_url
-                    break
+        pending = [url for url in urls if url not in results]
+        fetched = {}
+        if pending and self.router.allow('requests'):
+            if self.router.breakers['requests'].is_open:
+                # Probe with one product before sending the whole batch
+                fetched = self._fetch_async(pending[:1], stale, on_result)
+                if not self.router.breakers['requests'].is_open:
+                    fetched.update(self._fetch_async(pending[1:], stale, on_result))
+            else:
+                fetched = self._fetch_async(pending, stale, on_result)
         
-        # Extract availability
-        availability_selectors = [
-            '#availability span',
-            '.a-color-success',
-            '.a-color-price'
-        ]
-        
-        for selector in availability_selectors:
-            element = soup.select_one(selector)
-            if element:
-                availability_text = element.get_text(strip=True).lower()
-                if any(word in availability_text for word in ['in stock', 'available', 'ships']):
-                    product_info['availability'] = 'In Stock'
-                elif any(word in availability_text for word in ['out of stock', 'unavailable']):
-                    product_info['availability'] = 'Out of Stock'
-                break
+        for url in pending:
+            result = fetched.get(url)
+            if not result or not result.get('price'):
+                if self.router.allow('selenium'):
+                    print(f"Falling back to Selenium for {url}...")
+                    result = self.scrape_with_selenium(url)
+                    self.router.record('selenium', self._is_product_page(result))
+                    self._cache_result(url, result)
+                on_result(url, result)
+            results[url] = result
         
-        return product_info
+        return results
     
-    def _parse_price(self, price_text):
-        """Parse price from text string"""
-        if not price_text:
-            return None
+    def _fetch_async(self, urls, stale=None, on_result=None):
+        """Fetch URLs with the async engine and record their outcomes
         
-        # Remove currency symbols and extract numbers
-        price_text = re.sub(r'[^\d.,]', '', price_text)
-        
-        # Handle different decimal separators
-        if ',' in price_text and '.' in price_text:
-            # Assume comma is thousand separator
-            price_text = price_text.replace(',', '')
-        elif ',' in price_text:
-            # Could be decimal separator (European format)
-            if price_text.count(',') == 1 and len(price_text.split(',')[1]) <= 2:
-                price_text = price_text.replace(',', '.')
+        URLs with a `stale` cache entry are sent conditionally; a 304
+        refreshes the entry and returns its product info. Other pages are
+        cached along with their validators. Pages with a price are passed
+        to `on_result` as they arrive; the rest still need a fallback.
+        """
+        stale = stale or {}
+        parse = self.parse_pool.parse_async if self.parse_pool else self._parse_page
+        conditional = {url: self.cache.conditional_headers(stale[url]) for url in urls if url in stale}
+        validators = {}
+        fetched = {}
+        
+        def finished(url, product_info):
+            if product_info is NOT_MODIFIED:
+                # Page unchanged since it was cached
+                self.cache.refresh(self._cache_key(url))
+                product_info = stale[url]['product_info']
             else:
-                price_text = price_text.replace(',', '')
+                self._cache_result(url, product_info, validators.get(url))
+            fetched[url] = product_info
+            self.router.record('requests', self._is_product_page(product_info))
+            if on_result and product_info and product_info.get('price'):
+                on_result(url, product_info)
         
-        try:
-            return float(price_text)
-        except ValueError:
-            return None
+        self.async_fetcher.fetch_all(urls, parse, headers=conditional, validators=validators, on_result=finished)
+        return fetched
+    
+    def _is_product_page(self, product_info):
+        """Check whether a scrape got a real product page rather than a block"""
+        return bool(product_info and (product_info.get('price') or product_info.get('name')))
+    
+    def _cache_key(self, url):
+        """Get the cache key for a product URL, preferring its ASIN"""
+        asin = self.extract_asin_from_url(url)
+        if asin:
+            return f'asin:{asin}'
+        parsed_url = urlparse(url)
+        return f'url:{parsed_url.netloc.lower()}{parsed_url.path.rstrip("/")}'
+    
+    def _cache_result(self, url, product_info, headers=None):
+        if self.cache and product_info and product_info.get('price'):
+            self.cache.put(self._cache_key(url), url, product_info, headers)
+    
+    def _parse_page(self, html):
+        """Parse raw page HTML into product information"""
+        return parse_product_page(self.parser, html, fast_path=Config.EMBEDDED_DATA_FAST_PATH)
+    
+    def _extract_product_info(self, document):
+        """Extract product information from a document parsed by self.parser"""
+        return self.parser.extract(document)
+    
+    def _parse_price(self, price_text):
+        """Parse price from text string"""
+        return parse_price(price_text)
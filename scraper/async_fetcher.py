@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from urllib.parse import urlparse
+
+import aiohttp
+
+from scraper.parsers import StreamingExtractor
+
+# Result for a conditional request the server answered with 304 Not Modified
+NOT_MODIFIED = object()
+
+# Response headers a cached page is revalidated with
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+class AsyncFetcher:
+    """Fetch many product pages concurrently using asyncio and aiohttp"""
+
+    def __init__(self, headers, max_concurrency=8, per_host_limit=4, timeout=10,
+                 stream_chunk_size=None, stream_max_bytes=1024 * 1024, rate_limiter=None):
+        self.headers = dict(headers)
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        # Streaming stops reading once every field is found
+        self.stream_chunk_size = stream_chunk_size
+        self.stream_max_bytes = stream_max_bytes
+        self.logger = logging.getLogger(__name__)
+
+    def fetch_all(self, urls, parse, headers=None, validators=None, on_result=None):
+        """Fetch every URL and parse it, returning {url: product_info or None}
+
+        `parse` receives the raw page bytes. A coroutine function is awaited
+        (e.g. ParsePool.parse_async); a plain function runs in a worker
+        thread so CPU-bound parsing does not stall the event loop.
+        `headers` optionally maps URLs to extra request headers, such as
+        conditional ones; a 304 answer gives NOT_MODIFIED for that URL. If
+        a `validators` dict is given, it is filled with each response's
+        ETag / Last-Modified headers by URL. `on_result(url, product_info)`
+        is called for each URL as soon as it is done, on the event loop.
+        """
+        if not urls:
+            return {}
+        return asyncio.run(self._fetch_all(list(urls), parse, headers or {}, validators, on_result))
+
+    async def _fetch_all(self, urls, parse, headers, validators, on_result):
+        # Bounded number of requests in flight overall and per host
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        host_limits = {}
+        for url in urls:
+            host = urlparse(url).netloc
+            if host not in host_limits:
+                host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.per_host_limit
+        )
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=timeout) as session:
+            tasks = [
+                self._fetch_and_report(
+                    session, url, parse, global_limit, host_limits[urlparse(url).netloc],
+                    headers.get(url), validators, on_result
+                )
+                for url in urls
+            ]
+            results = await asyncio.gather(*tasks)
+
+        return dict(zip(urls, results))
+
+    async def _fetch_and_report(self, session, url, parse, global_limit, host_limit, headers, validators, on_result):
+        product_info = await self._fetch_one(session, url, parse, global_limit, host_limit, headers, validators)
+        if on_result:
+            on_result(url, product_info)
+        return product_info
+
+    async def _fetch_one(self, session, url, parse, global_limit, host_limit, headers=None, validators=None):
+        """Fetch and parse a single URL, returning None on failure"""
+        try:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async(urlparse(url).netloc)
+
+            async with host_limit, global_limit:
+                async with session.get(url, headers=headers) as response:
+                    response.raise_for_status()
+                    if response.status == 304:
+                        return NOT_MODIFIED
+                    if validators is not None:
+                        validators[url] = {
+                            name: response.headers[name] for name in VALIDATOR_HEADERS if name in response.headers
+                        }
+                    if self.stream_chunk_size:
+                        product_info, body = await self._read_streaming(response)
+                        if product_info:
+                            return product_info
+                    else:
+                        body = await response.read()
+
+            if asyncio.iscoroutinefunction(parse):
+                return await parse(body)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, parse, body)
+
+        except Exception as e:
+            self.logger.warning(f"Async fetch failed for {url}: {e}")
+            return None
+
+    async def _read_streaming(self, response):
+        """Read chunks until all fields are found or the byte cap is hit
+
+        Returns (product_info, None) on early completion, otherwise
+        (None, body) with the full body for the normal parse.
+        """
+        extractor = StreamingExtractor(max_bytes=self.stream_max_bytes)
+        async for chunk in response.content.iter_chunked(self.stream_chunk_size):
+            if extractor.feed(chunk):
+                return extractor.product_info, None
+            if extractor.exhausted:
+                break
+
+        return None, extractor.body() + await response.read()
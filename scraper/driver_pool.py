@@ -0,0 +1,164 @@
+import atexit
+import logging
+import queue
+import threading
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+from config.settings import Config
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def get_driver_path():
+    """Resolve the ChromeDriver binary once per process"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
+class DriverPool:
+    """Pool of warm, reusable headless Chrome drivers
+
+    Drivers are started lazily up to `max_size`, health-checked before being
+    handed out, and recycled after serving `max_pages` pages.
+    """
+
+    def __init__(self, user_agent, max_size=2, max_pages=50, acquire_timeout=120, page_load_timeout=30):
+        self.user_agent = user_agent
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.acquire_timeout = acquire_timeout
+        self.page_load_timeout = page_load_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._closed = False
+
+        atexit.register(self.shutdown)
+
+    def acquire(self):
+        """Take a healthy driver from the pool, starting one if needed"""
+        if self._closed:
+            raise RuntimeError("Driver pool is shut down")
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError("Timed out waiting for a free Chrome driver")
+
+        try:
+            while True:
+                try:
+                    driver = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._create_driver()
+
+                if self._is_healthy(driver):
+                    return driver
+                self.logger.info("Discarding unhealthy Chrome driver")
+                self._discard(driver)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, driver):
+        """Return a driver to the pool, recycling it when worn out"""
+        try:
+            with self._lock:
+                pages = self._pages.get(id(driver), 0) + 1
+                self._pages[id(driver)] = pages
+
+            if self._closed or pages >= self.max_pages:
+                self._discard(driver)
+            else:
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        """Quit every idle driver; drivers in use are quit when released"""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def stats(self):
+        """Get current pool status"""
+        return {
+            'max_size': self.max_size,
+            'idle': self._idle.qsize(),
+            'live': len(self._pages),
+            'closed': self._closed
+        }
+
+    def _create_driver(self):
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920,1080')
+        chrome_options.add_argument(f'--user-agent={self.user_agent}')
+
+        service = Service(get_driver_path())
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver.set_page_load_timeout(self.page_load_timeout)
+
+        with self._lock:
+            self._pages[id(driver)] = 0
+        self.logger.info("Started new Chrome driver")
+        return driver
+
+    def _is_healthy(self, driver):
+        try:
+            return driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.warning(f"Error quitting Chrome driver: {e}")
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_driver_pool(user_agent):
+    """Get the process-wide driver pool, starting a new one after it was closed
+
+    Every scraper in the process borrows from this pool, so at most
+    SELENIUM_POOL_SIZE browsers run at once.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None or _shared_pool.stats()['closed']:
+            _shared_pool = DriverPool(
+                user_agent,
+                max_size=Config.SELENIUM_POOL_SIZE,
+                max_pages=Config.SELENIUM_MAX_PAGES_PER_DRIVER
+            )
+        return _shared_pool
+
+
+def close_driver_pool():
+    """Quit the process-wide pool's browsers"""
+    global _shared_pool
+    with _shared_pool_lock:
+        pool, _shared_pool = _shared_pool, None
+    if pool:
+        pool.shutdown()
@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """Disk-backed cache of scraped product pages
+
+    Entries hold the extracted product info plus the page's ETag and
+    Last-Modified validators. An entry is served directly for `ttl` seconds,
+    can be revalidated with a conditional request until `max_age`, and the
+    least recently used entries are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, path, ttl=900, max_age=86400, max_entries=5000):
+        self.path = path
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                product_info TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_response_cache_accessed_at ON response_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """Get a cache entry, or None if missing or too old to revalidate
+
+        The returned dict has a 'fresh' flag telling whether it can be used
+        without contacting the server.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, product_info, etag, last_modified, fetched_at FROM response_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            url, product_info, etag, last_modified, fetched_at = row
+            age = now - fetched_at
+            if age > self.max_age or (age > self.ttl and not (etag or last_modified)):
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute("UPDATE response_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+
+        return {
+            'url': url,
+            'product_info': json.loads(product_info),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh': age <= self.ttl
+        }
+
+    def put(self, key, url, product_info, headers=None):
+        """Store product info along with any validators from the response headers"""
+        headers = headers or {}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache "
+                "(key, url, product_info, etag, last_modified, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, json.dumps(product_info), headers.get('ETag'),
+                 headers.get('Last-Modified'), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, key):
+        """Mark an entry as fetched now after a 304 Not Modified"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE response_cache SET fetched_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key)
+            )
+            self._conn.commit()
+
+    def conditional_headers(self, entry):
+        """Get If-None-Match / If-Modified-Since headers for revalidating an entry"""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def clear(self):
+        """Remove every cache entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+            self._conn.commit()
+
+    def _evict(self):
+        # Drop least recently used entries beyond the size limit
+        count = self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE key IN "
+                "(SELECT key FROM response_cache ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            )
+            self.logger.debug(f"Evicted {excess} cached responses")
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from scraper.parsers import get_parser, parse_product_page
+from scraper.selector_stats import SelectorStats
+
+# Per-worker state, set up once by _init_worker
+_worker_parser = None
+_worker_stats = None
+_worker_fast_path = True
+
+
+def _init_worker(backend, fast_path, selector_counts):
+    """Build the worker's parser and compiled selectors once"""
+    global _worker_parser, _worker_stats, _worker_fast_path
+
+    if selector_counts is not None:
+        # Start from the parent's learned selector order
+        _worker_stats = SelectorStats()
+        _worker_stats.merge(selector_counts)
+        _worker_stats.drain()
+
+    _worker_parser = get_parser(backend, stats=_worker_stats)
+    _worker_fast_path = fast_path
+
+
+def _parse_in_worker(html):
+    """Parse one page, returning (product_info, selector counts recorded)"""
+    product_info = parse_product_page(_worker_parser, html, fast_path=_worker_fast_path)
+    counts = _worker_stats.drain() if _worker_stats else None
+    return product_info, counts
+
+
+class ParsePool:
+    """Parse raw pages in a pool of worker processes
+
+    Fetching stays in the caller's event loop or threads; only the
+    CPU-bound parse is shipped to the workers, so parsing throughput scales
+    with cores. Selector hit counts recorded by workers are merged back into
+    `selector_stats`.
+    """
+
+    def __init__(self, backend, workers, fast_path=True, selector_stats=None):
+        self.backend = backend
+        self.workers = workers
+        self.fast_path = fast_path
+        self.selector_stats = selector_stats
+        self.logger = logging.getLogger(__name__)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def parse(self, html):
+        """Parse a page in a worker process and wait for the result"""
+        future = self._get_executor().submit(_parse_in_worker, html)
+        return self._collect(future.result())
+
+    async def parse_async(self, html):
+        """Parse a page in a worker process without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._get_executor(), _parse_in_worker, html)
+        return self._collect(result)
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            if sys.version_info >= (3, 9):
+                executor.shutdown(wait=True, cancel_futures=True)
+            else:
+                executor.shutdown(wait=True)
+
+    def _collect(self, result):
+        product_info, counts = result
+        if counts and self.selector_stats:
+            self.selector_stats.merge(counts)
+        return product_info
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                selector_counts = None
+                if self.selector_stats:
+                    selector_counts = self.selector_stats.counts()
+
+                # Spawned workers avoid forking the app's threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.backend, self.fast_path, selector_counts)
+                )
+                self.logger.info(f"Started {self.workers} parser worker processes")
+            return self._executor
@@ -0,0 +1,449 @@
+import html as html_lib
+import json
+import re
+
+from bs4 import BeautifulSoup
+
+# Selector lists, tried in order for each field
+NAME_SELECTORS = [
+    '#productTitle',
+    '.product-title',
+    'h1.a-size-large',
+    'h1'
+]
+
+PRICE_SELECTORS = [
+    '.a-price-whole',
+    '.a-offscreen',
+    '.a-price .a-offscreen',
+    '#priceblock_dealprice',
+    '#priceblock_ourprice',
+    '#tp_price_block_total_price_ww',
+    '.a-price-range .a-offscreen'
+]
+
+IMAGE_SELECTORS = [
+    '#landingImage',
+    '.a-dynamic-image',
+    '#imgBlkFront',
+    '.item-image-canvas img'
+]
+
+AVAILABILITY_SELECTORS = [
+    '#availability span',
+    '.a-color-success',
+    '.a-color-price'
+]
+
+# Selectors for the main product's buy box, tried ahead of any learned order
+# so a generic one (e.g. matching a carousel price) can never outrank them
+PINNED_SELECTORS = {
+    'name': ['#productTitle'],
+    'price': ['#priceblock_dealprice', '#priceblock_ourprice', '#tp_price_block_total_price_ww'],
+    'image_url': ['#landingImage'],
+    'availability': ['#availability span']
+}
+
+
+def empty_product_info():
+    """Get a product info dict with every field unset"""
+    return {
+        'name': None,
+        'price': None,
+        'image_url': None,
+        'availability': None
+    }
+
+
+def parse_price(price_text):
+    """Parse price from text string"""
+    if not price_text:
+        return None
+
+    # Remove currency symbols and extract numbers
+    price_text = re.sub(r'[^\d.,]', '', price_text)
+
+    # Handle different decimal separators
+    if ',' in price_text and '.' in price_text:
+        # Assume comma is thousand separator
+        price_text = price_text.replace(',', '')
+    elif ',' in price_text:
+        # Could be decimal separator (European format)
+        if price_text.count(',') == 1 and len(price_text.split(',')[1]) <= 2:
+            price_text = price_text.replace(',', '.')
+        else:
+            price_text = price_text.replace(',', '')
+
+    try:
+        return float(price_text)
+    except ValueError:
+        return None
+
+
+def parse_availability(availability_text):
+    """Map availability text to 'In Stock', 'Out of Stock' or None"""
+    availability_text = availability_text.lower()
+    if any(word in availability_text for word in ['in stock', 'available', 'ships']):
+        return 'In Stock'
+    elif any(word in availability_text for word in ['out of stock', 'unavailable']):
+        return 'Out of Stock'
+    return None
+
+
+# Byte patterns for the embedded-data fast path
+_JSON_LD_RE = re.compile(rb'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.S | re.I)
+# The number must be followed by its terminator, so a page cut mid-number never matches
+_PRICE_AMOUNT_RE = re.compile(rb'"priceAmount"\s*:\s*"?(\d+(?:\.\d+)?)(?=\s*"?\s*[,}])')
+_TITLE_RE = re.compile(rb'<span[^>]*\bid=["\']productTitle["\'][^>]*>(.*?)</span>', re.S)
+_LANDING_IMAGE_RE = re.compile(rb'<img[^>]*\bid=["\']landingImage["\'][^>]*>', re.S)
+_SRC_RE = re.compile(rb'\s(?:src|data-src)=["\']([^"\']+)["\']')
+_AVAILABILITY_RE = re.compile(rb'\bid=["\']availability["\'][^>]*>.*?<span[^>]*>(.*?)</span>', re.S)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+SCHEMA_AVAILABILITY = {
+    'instock': 'In Stock',
+    'limitedavailability': 'In Stock',
+    'preorder': 'In Stock',
+    'outofstock': 'Out of Stock',
+    'soldout': 'Out of Stock',
+    'discontinued': 'Out of Stock',
+}
+
+
+def _markup_text(raw):
+    """Decode a markup fragment to plain text"""
+    text = _TAG_RE.sub('', raw.decode('utf-8', 'replace'))
+    return html_lib.unescape(text).strip()
+
+
+def _json_ld_products(raw):
+    """Yield schema.org Product objects from JSON-LD blocks"""
+    for match in _JSON_LD_RE.finditer(raw):
+        try:
+            data = json.loads(match.group(1).decode('utf-8', 'replace'))
+        except ValueError:
+            continue
+
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                types = item.get('@type')
+                types = types if isinstance(types, list) else [types]
+                if 'Product' in types:
+                    yield item
+                if '@graph' in item:
+                    stack.append(item['@graph'])
+
+
+def _json_ld_info(product, product_info):
+    """Fill product_info fields from a schema.org Product object"""
+    if isinstance(product.get('name'), str):
+        product_info['name'] = html_lib.unescape(product['name']).strip() or None
+
+    image = product.get('image')
+    if isinstance(image, list):
+        image = image[0] if image else None
+    if isinstance(image, dict):
+        image = image.get('url')
+    if isinstance(image, str):
+        product_info['image_url'] = image
+
+    offers = product.get('offers')
+    offers = offers if isinstance(offers, list) else [offers]
+    for offer in offers:
+        if not isinstance(offer, dict):
+            continue
+        price = offer.get('price', offer.get('lowPrice'))
+        price = parse_price(str(price)) if price is not None else None
+        if price:
+            product_info['price'] = price
+            availability = str(offer.get('availability', '')).rsplit('/', 1)[-1].lower()
+            product_info['availability'] = SCHEMA_AVAILABILITY.get(availability)
+            break
+
+
+def extract_embedded_info(html):
+    """Extract product info from embedded page data without building a DOM
+
+    Scans the raw bytes for JSON-LD Product blocks and the inline price JSON
+    (`"priceAmount"`), plus the title, landing image and availability
+    fragments. Fields that cannot be found are left as None.
+    """
+    raw = html.encode('utf-8') if isinstance(html, str) else html
+    product_info = empty_product_info()
+
+    for product in _json_ld_products(raw):
+        _json_ld_info(product, product_info)
+        if product_info['price']:
+            break
+
+    if not product_info['price']:
+        match = _PRICE_AMOUNT_RE.search(raw)
+        if match:
+            product_info['price'] = parse_price(match.group(1).decode('ascii'))
+
+    if not product_info['name']:
+        match = _TITLE_RE.search(raw)
+        if match:
+            product_info['name'] = _markup_text(match.group(1)) or None
+
+    if not product_info['image_url']:
+        match = _LANDING_IMAGE_RE.search(raw)
+        if match:
+            src = _SRC_RE.search(match.group(0))
+            if src:
+                product_info['image_url'] = html_lib.unescape(src.group(1).decode('utf-8', 'replace'))
+
+    if not product_info['availability']:
+        match = _AVAILABILITY_RE.search(raw)
+        if match:
+            product_info['availability'] = parse_availability(_markup_text(match.group(1)))
+
+    return product_info
+
+
+class StreamingExtractor:
+    """Run the embedded-data scan over a page as its bytes arrive
+
+    `feed` returns True once every product_info field has been found, so the
+    caller can close the connection. After `max_bytes` the scan stops and
+    the caller should parse the full body instead.
+
+    Each feed only rescans the bytes after the previous scan, plus an
+    overlap for fragments cut by a chunk boundary and any `<script>` block
+    still open, so a page is scanned in linear time.
+    """
+
+    # Bytes rescanned before the new data; longer than any non-script fragment
+    OVERLAP = 4096
+
+    def __init__(self, max_bytes=1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.product_info = empty_product_info()
+        self._chunks = []
+        self._scan_from = 0
+
+    @property
+    def complete(self):
+        return all(value is not None for value in self.product_info.values())
+
+    @property
+    def exhausted(self):
+        return self.size >= self.max_bytes
+
+    def feed(self, chunk):
+        """Add a chunk of page bytes, returning True when all fields are found"""
+        if not chunk:
+            return self.complete
+        self._chunks.append(chunk)
+        self.size += len(chunk)
+
+        body = self.body()
+        found = extract_embedded_info(body[self._scan_from:])
+        for field, value in found.items():
+            if self.product_info[field] is None:
+                self.product_info[field] = value
+
+        # JSON-LD only parses once its script closes, so keep an open one in the window
+        scan_from = max(self._scan_from, len(body) - self.OVERLAP)
+        open_script = body.rfind(b'<script', self._scan_from)
+        if open_script != -1 and body.find(b'</script>', open_script) == -1:
+            scan_from = min(scan_from, open_script)
+        self._scan_from = scan_from
+        return self.complete
+
+    def body(self):
+        """Get the bytes received so far"""
+        if len(self._chunks) > 1:
+            self._chunks = [b''.join(self._chunks)]
+        return self._chunks[0] if self._chunks else b''
+
+
+def parse_product_page(parser, html, fast_path=True):
+    """Extract product info from raw page HTML
+
+    With `fast_path`, embedded page data is tried first and the full DOM
+    parse only runs when it misses a field; any fields found by the fast
+    path take precedence over the selector walk, which only looks up the
+    fields still missing.
+    """
+    product_info = extract_embedded_info(html) if fast_path else empty_product_info()
+    if all(value is not None for value in product_info.values()):
+        return product_info
+
+    # Only walk selectors for missing fields, so their hit counts match what is used
+    missing = [field for field, value in product_info.items() if value is None]
+    dom_info = parser.extract(parser.parse(html), fields=missing)
+    return {field: product_info[field] or dom_info[field] for field in dom_info}
+
+
+class BaseParser:
+    """Extract product info from a page using a backend's selector engine
+
+    Subclasses implement `parse` (raw HTML to a document), `select` (all
+    matches of a selector), `text` and `attr`.
+    """
+    name = None
+
+    # Optional SelectorStats used to learn the selector order
+    stats = None
+
+    def extract(self, document, fields=None):
+        """Extract product information from a parsed document
+
+        Only `fields` are looked up when given; the rest stay None. Each
+        field takes the first selector that matches, which counts as its hit.
+        """
+        product_info = empty_product_info()
+        fields = set(fields or product_info)
+
+        # Extract product name
+        for selector in self._selectors('name', NAME_SELECTORS, fields):
+            element = self.select_one(document, selector)
+            self._record('name', selector, element is not None)
+            if element is not None:
+                product_info['name'] = self.text(element)
+                break
+
+        # Extract price
+        for selector in self._selectors('price', PRICE_SELECTORS, fields):
+            for element in self.select(document, selector):
+                price = parse_price(self.text(element))
+                if price:
+                    product_info['price'] = price
+                    break
+            self._record('price', selector, product_info['price'] is not None)
+            if product_info['price']:
+                break
+
+        # Extract main product image
+        for selector in self._selectors('image_url', IMAGE_SELECTORS, fields):
+            element = self.select_one(document, selector)
+            image_url = None
+            if element is not None:
+                image_url = self.attr(element, 'src') or self.attr(element, 'data-src')
+            self._record('image_url', selector, bool(image_url))
+            if image_url:
+                product_info['image_url'] = image_url
+                break
+
+        # Extract availability
+        for selector in self._selectors('availability', AVAILABILITY_SELECTORS, fields):
+            element = self.select_one(document, selector)
+            self._record('availability', selector, element is not None)
+            if element is not None:
+                product_info['availability'] = parse_availability(self.text(element))
+                break
+
+        if self.stats:
+            self.stats.record_page()
+        return product_info
+
+    def _selectors(self, field, selectors, fields):
+        if field not in fields:
+            return []
+        if not self.stats:
+            return selectors
+        return self.stats.ordered(field, selectors, pinned=PINNED_SELECTORS.get(field, ()))
+
+    def _record(self, field, selector, hit):
+        if self.stats:
+            self.stats.record(field, selector, hit)
+
+    def extract_html(self, html):
+        """Parse raw HTML and extract product information"""
+        return self.extract(self.parse(html))
+
+    def select_one(self, document, selector):
+        matches = self.select(document, selector)
+        return matches[0] if matches else None
+
+
+class BeautifulSoupParser(BaseParser):
+    """BeautifulSoup with Python's built-in html.parser"""
+    name = 'html.parser'
+
+    def parse(self, html):
+        return BeautifulSoup(html, 'html.parser')
+
+    def select(self, document, selector):
+        return document.select(selector)
+
+    def select_one(self, document, selector):
+        return document.select_one(selector)
+
+    def text(self, element):
+        return element.get_text(strip=True)
+
+    def attr(self, element, name):
+        return element.get(name)
+
+
+class LxmlParser(BaseParser):
+    """lxml with selectors compiled to XPath once per parser instance"""
+    name = 'lxml'
+
+    # Text under these tags is ignored, matching BeautifulSoup's get_text
+    SKIPPED_TAGS = ('script', 'style', 'template')
+
+    def __init__(self):
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+
+        self._html = lxml.html
+        self._compiled = {
+            selector: CSSSelector(selector)
+            for selector in NAME_SELECTORS + PRICE_SELECTORS + IMAGE_SELECTORS + AVAILABILITY_SELECTORS
+        }
+
+    def parse(self, html):
+        try:
+            return self._html.document_fromstring(html)
+        except Exception:
+            # Empty or unparseable documents yield no matches
+            return self._html.document_fromstring('<html></html>')
+
+    def select(self, document, selector):
+        return self._compiled[selector](document)
+
+    def text(self, element):
+        parts = []
+        self._collect_text(element, parts)
+        return ''.join(part.strip() for part in parts if part.strip())
+
+    def attr(self, element, name):
+        return element.get(name)
+
+    def _collect_text(self, element, parts):
+        if element.tag in self.SKIPPED_TAGS:
+            return
+        if element.text:
+            parts.append(element.text)
+        for child in element:
+            if isinstance(child.tag, str):
+                self._collect_text(child, parts)
+            if child.tail:
+                parts.append(child.tail)
+
+
+PARSER_BACKENDS = {
+    BeautifulSoupParser.name: BeautifulSoupParser,
+    LxmlParser.name: LxmlParser,
+}
+
+
+def get_parser(backend, stats=None):
+    """Create the parser for a backend name from PARSER_BACKENDS
+
+    With `stats`, selectors are reordered by their recorded hit rates.
+    """
+    try:
+        parser = PARSER_BACKENDS[backend]()
+    except KeyError:
+        raise ValueError(f"Unknown parser backend: {backend}")
+    parser.stats = stats
+    return parser
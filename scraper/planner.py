@@ -0,0 +1,205 @@
+import heapq
+import statistics
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+
+class BasePlanner(ABC):
+    """Per-product next-due times kept in a heap
+
+    Subclasses decide when each product is next due in `sync` and `record`.
+    """
+
+    def __init__(self):
+        self._due = {}
+        self._heap = []
+
+    @abstractmethod
+    def sync(self, products, recent_prices, now, states=None):
+        """Track the active products and schedule new ones
+
+        `recent_prices` maps product id to a chronological list of
+        (timestamp, price) pairs. `states` maps product id to its persisted
+        scrape markers; a stored next due time is resumed as is, so
+        overdue products are caught up once after a restart.
+        """
+
+    @abstractmethod
+    def record(self, product, prices, success, now):
+        """Schedule a product's next scrape after one finished"""
+
+    def pop_due(self, now, limit):
+        """Take up to `limit` product ids whose due time has passed"""
+        due_ids = []
+        while self._heap and len(due_ids) < limit:
+            due, product_id = self._heap[0]
+            if due > now:
+                break
+            heapq.heappop(self._heap)
+            # Skip heap entries superseded by a later reschedule
+            if self._due.get(product_id) == due:
+                del self._due[product_id]
+                due_ids.append(product_id)
+        return due_ids
+
+    def next_due(self, limit=10):
+        """Get the soonest (due time, product id) pairs"""
+        return sorted((due, product_id) for product_id, due in self._due.items())[:limit]
+
+    def due_at(self, product_id):
+        """Get when a product is next due, if it is scheduled"""
+        return self._due.get(product_id)
+
+    def __len__(self):
+        return len(self._due)
+
+    def _forget_inactive(self, products):
+        active_ids = {product.id for product in products}
+        removed = [product_id for product_id in self._due if product_id not in active_ids]
+        for product_id in removed:
+            del self._due[product_id]
+        return removed
+
+    @staticmethod
+    def _stored_due(states, product_id, now):
+        state = (states or {}).get(product_id)
+        if state is None or state.next_due_at is None:
+            return None
+        return max(state.next_due_at, now)
+
+    def _schedule(self, product_id, due):
+        self._due[product_id] = due
+        heapq.heappush(self._heap, (due, product_id))
+
+
+class AdaptivePlanner(BasePlanner):
+    """Per-product next-due times driven by volatility and target proximity
+
+    Each product gets a weight from how often its recent prices changed,
+    how close it is to its target price and how often scraping it failed.
+    Intervals are inversely proportional to weight and normalized so the
+    average interval stays `base_hours`, keeping the request budget the same
+    as scraping everything every `base_hours`. Due products are taken from a
+    heap.
+    """
+
+    MAX_FAILURE_BACKOFF = 5
+
+    def __init__(self, base_hours, min_hours=1, max_hours=48):
+        super().__init__()
+        self.base_hours = base_hours
+        self.min_hours = min_hours
+        self.max_hours = max_hours
+        self.failures = {}
+        self._weights = {}
+
+    def sync(self, products, recent_prices, now, states=None):
+        """Recompute weights for the active products and schedule new ones
+
+        Products without a stored due time are due one interval after their
+        last recorded price, or now.
+        """
+        for product_id in self._forget_inactive(products):
+            self._weights.pop(product_id, None)
+            self.failures.pop(product_id, None)
+
+        new_products = [product for product in products if product.id not in self._due]
+        for product in new_products:
+            state = (states or {}).get(product.id)
+            if state is not None and state.failure_count:
+                self.failures[product.id] = state.failure_count
+
+        for product in products:
+            prices = [price for _, price in recent_prices.get(product.id, [])]
+            self._weights[product.id] = self.weight(product, prices)
+
+        for product in new_products:
+            due = self._stored_due(states, product.id, now)
+            if due is None:
+                history = recent_prices.get(product.id)
+                due = history[-1][0] + self.interval(product.id) if history else now
+            self._schedule(product.id, max(due, now))
+
+    def weight(self, product, prices):
+        """Score how likely a product's price is to change meaningfully"""
+        # Share of consecutive scrapes where the price moved
+        changes = sum(1 for previous, current in zip(prices, prices[1:]) if current != previous)
+        volatility = changes / (len(prices) - 1) if len(prices) > 1 else 0.5
+
+        # Products just above their target are worth watching closely
+        proximity = 0.0
+        current_price = product.current_price or (prices[-1] if prices else None)
+        if product.target_price and current_price:
+            gap = (current_price - product.target_price) / product.target_price
+            proximity = 0.5 if gap <= 0 else 1 / (1 + gap * 10)
+
+        failures = min(self.failures.get(product.id, 0), self.MAX_FAILURE_BACKOFF)
+        return (1 + 3 * volatility + 3 * proximity) * 0.5 ** failures
+
+    def interval(self, product_id):
+        """Get a product's scrape interval as a timedelta"""
+        mean_weight = statistics.mean(self._weights.values()) if self._weights else 1
+        weight = self._weights.get(product_id, mean_weight)
+        hours = self.base_hours * mean_weight / weight
+        return timedelta(hours=min(self.max_hours, max(self.min_hours, hours)))
+
+    def record(self, product, prices, success, now):
+        """Update a product's weight after a scrape and schedule its next one"""
+        if success:
+            self.failures.pop(product.id, None)
+        else:
+            self.failures[product.id] = self.failures.get(product.id, 0) + 1
+        self._weights[product.id] = self.weight(product, prices)
+        self._schedule(product.id, now + self.interval(product.id))
+
+
+class StaggeredPlanner(BasePlanner):
+    """Spread scrapes of every product evenly across the interval
+
+    Each product gets a fixed offset within the interval from a hash of its
+    ASIN and is scraped once per interval at that offset, so a steady
+    dispatch loop replaces one burst per interval with a flat request rate
+    while keeping the same total volume.
+    """
+
+    # Fixed reference point so offsets survive restarts
+    EPOCH = datetime(2000, 1, 1)
+
+    def __init__(self, base_hours):
+        super().__init__()
+        self.interval = timedelta(hours=base_hours)
+
+    def offset(self, product):
+        """Get a product's stable position within the interval"""
+        key = product.asin or str(product.id)
+        return self.interval * (zlib.crc32(key.encode()) / 2 ** 32)
+
+    def next_slot(self, product, after):
+        """Get the product's first slot at or after `after`"""
+        phase = self.EPOCH + self.offset(product)
+        cycles = -((phase - after) // self.interval)  # ceiling division
+        return phase + cycles * self.interval
+
+    def sync(self, products, recent_prices, now, states=None):
+        """Track the active products and schedule new ones at their slot
+
+        A product scraped recently waits at least half an interval, so
+        enabling this mode does not re-scrape it straight away.
+        """
+        self._forget_inactive(products)
+        for product in products:
+            if product.id not in self._due:
+                due = self._stored_due(states, product.id, now)
+                if due is None:
+                    history = recent_prices.get(product.id)
+                    earliest = now
+                    if history:
+                        earliest = max(now, history[-1][0] + self.interval / 2)
+                    due = self.next_slot(product, earliest)
+                self._schedule(product.id, due)
+
+    def record(self, product, prices, success, now):
+        """Schedule a product's next scrape at its next slot"""
+        # Never slot twice in one interval, even if a dispatch ran late
+        self._schedule(product.id, self.next_slot(product, now + self.interval / 2))
@@ -0,0 +1,68 @@
+import asyncio
+import random
+import threading
+import time
+
+from config.settings import Config
+
+
+class RateLimiter:
+    """Token-bucket rate limiter per host, shared by every scrape path
+
+    Each call reserves the next free slot for its host and returns at once
+    with the time to wait, so callers only sleep for their own slot and
+    concurrent workers together use the full `requests_per_minute` budget.
+    Up to `burst` requests may go out back to back after an idle period.
+    `jitter` spreads slots by up to that fraction of the interval either
+    way, keeping the average rate unchanged.
+    """
+
+    def __init__(self, requests_per_minute=12, burst=1, jitter=0.3):
+        self.interval = 60.0 / requests_per_minute
+        self.burst = max(1, burst)
+        self.jitter = jitter
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, host):
+        """Reserve the next request slot for a host, returning seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot.get(host, now), now)
+            self._next_slot[host] = slot + self.interval
+            wait = slot - (self.burst - 1) * self.interval - now
+
+        if wait > 0 and self.jitter:
+            wait += random.uniform(-self.jitter, self.jitter) * self.interval
+        return max(0.0, wait)
+
+    def acquire(self, host):
+        """Block the calling thread until a request to host is allowed"""
+        wait = self.reserve(host)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, host):
+        """Wait without blocking the event loop until a request to host is allowed"""
+        wait = self.reserve(host)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Get the process-wide rate limiter configured from Config"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RateLimiter(
+                requests_per_minute=Config.REQUESTS_PER_MINUTE,
+                burst=Config.RATE_LIMIT_BURST,
+                jitter=Config.RATE_LIMIT_JITTER
+            )
+        return _shared
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from config.settings import Config
+
+
+class CircuitBreaker:
+    """Track recent outcomes for one scraping backend
+
+    The breaker opens when the success rate over the last `window` attempts
+    drops below `min_success_rate`. While open, `allow` only lets a single
+    probe through every `cooldown` seconds; a successful probe closes it.
+    """
+
+    def __init__(self, name, window=20, min_attempts=5, min_success_rate=0.3, cooldown=300):
+        self.name = name
+        self.min_attempts = min_attempts
+        self.min_success_rate = min_success_rate
+        self.cooldown = cooldown
+        self.logger = logging.getLogger(__name__)
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._last_probe = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def success_rate(self):
+        with self._lock:
+            if not self._outcomes:
+                return 1.0
+            return sum(self._outcomes) / len(self._outcomes)
+
+    def ready(self):
+        """Check whether `allow` would let a request through, without using up a probe"""
+        with self._lock:
+            return self._probe_due(time.monotonic())
+
+    def allow(self):
+        """Claim the right to use this backend now, using up the probe if open"""
+        with self._lock:
+            now = time.monotonic()
+            if not self._probe_due(now):
+                return False
+            if self._opened_at is not None:
+                self._last_probe = now
+            return True
+
+    def record(self, success):
+        """Record the outcome of an attempt"""
+        with self._lock:
+            self._outcomes.append(1 if success else 0)
+
+            if self._opened_at is not None:
+                if success:
+                    self._close()
+                return
+
+            attempts = len(self._outcomes)
+            rate = sum(self._outcomes) / attempts
+            if attempts >= self.min_attempts and rate < self.min_success_rate:
+                self._opened_at = time.monotonic()
+                self._last_probe = None
+                self.logger.warning(
+                    f"Circuit opened for {self.name} backend ({rate:.0%} success over {attempts} attempts)"
+                )
+
+    def status(self):
+        return {
+            'state': 'open' if self.is_open else 'closed',
+            'success_rate': self.success_rate(),
+            'attempts': len(self._outcomes)
+        }
+
+    def _probe_due(self, now):
+        if self._opened_at is None:
+            return True
+        return now - (self._last_probe or self._opened_at) >= self.cooldown
+
+    def _close(self):
+        self._opened_at = None
+        self._last_probe = None
+        self._outcomes.clear()
+        self.logger.info(f"Circuit closed for {self.name} backend")
+
+
+class BackendRouter:
+    """Decide which scraping backends to try, cheapest first
+
+    Backends whose circuit is open are skipped, except for periodic probes,
+    so a blocking episode costs one browser load per product instead of a
+    wasted HTTP fetch followed by a browser load.
+    """
+
+    def __init__(self, backends, **breaker_options):
+        self.breakers = {name: CircuitBreaker(name, **breaker_options) for name in backends}
+        self.backends = list(backends)
+
+    def plan(self):
+        """Get the backends to try for the next product, in order
+
+        This has no side effects; call `allow` just before actually using
+        a backend, so probes aren't spent on backends that never run.
+        """
+        ready = [name for name in self.backends if self.breakers[name].ready()]
+        # Always keep the last resort available
+        return ready or self.backends[-1:]
+
+    def allow(self, backend):
+        """Claim a backend for one attempt, using up its probe if its circuit is open"""
+        if self.breakers[backend].allow():
+            return True
+        # The last resort is still allowed once nothing else is
+        return backend == self.backends[-1] and not any(
+            self.breakers[name].ready() for name in self.backends[:-1]
+        )
+
+    def record(self, backend, success):
+        self.breakers[backend].record(success)
+
+    def status(self):
+        return {name: breaker.status() for name, breaker in self.breakers.items()}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_backend_router():
+    """Get the process-wide backend router configured from Config
+
+    The web app and scheduler share it, so a block detected by one is
+    respected by the other.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = BackendRouter(
+                ['requests', 'selenium'],
+                window=Config.BACKEND_HEALTH_WINDOW,
+                min_success_rate=Config.BACKEND_MIN_SUCCESS_RATE,
+                cooldown=Config.BACKEND_PROBE_INTERVAL
+            )
+        return _shared
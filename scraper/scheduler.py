@@ -1,103 +1,373 @@
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-from database.models import db, Product
+from database.archive import archive_cold_history, get_price_archive
+from database.models import db, Product, get_est_now
+from database.batch_writer import PriceBatchWriter
 from database.db_manager import DatabaseManager
+from database.retention import deadline_after, past_deadline
+from database.rollups import compact_history, hour_start
 from scraper.amazon_scraper import AmazonScraper
+from scraper.planner import AdaptivePlanner, StaggeredPlanner
+from scraper.single_flight import price_check_flights
 from notifications.slack_notifier import SlackNotifier
 from config.settings import Config
 import logging
-import time
-import random
+import threading
 from datetime import datetime, timedelta
 import pytz
 
 # EST timezone  
 EST = pytz.timezone('US/Eastern')
 
+# The started scheduler, used by the job functions below
+_active_scheduler = None
+
+
+# Jobs call module-level functions so the job store can persist them by name
+def run_price_check():
+    if _active_scheduler:
+        _active_scheduler.check_all_prices()
+
+
+def run_dispatch():
+    if _active_scheduler:
+        _active_scheduler.dispatch_due_products()
+
+
+def run_cleanup():
+    if _active_scheduler:
+        _active_scheduler.cleanup_old_data()
+
+
+def run_recompute_stats():
+    if _active_scheduler:
+        _active_scheduler.recompute_stats()
+
+
 class PriceScheduler:
     def __init__(self, app):
         self.app = app
-        self.scheduler = BackgroundScheduler()
+        self.scheduler = BackgroundScheduler(job_defaults={
+            'coalesce': Config.SCHEDULER_COALESCE,
+            'misfire_grace_time': Config.SCHEDULER_MISFIRE_GRACE_SECONDS,
+            'max_instances': 1
+        })
         self.scraper = AmazonScraper()
+        self.price_writer = PriceBatchWriter(
+            app,
+            max_batch=Config.PRICE_WRITE_BATCH_SIZE,
+            max_delay=Config.PRICE_WRITE_MAX_DELAY
+        )
         self.slack_notifier = SlackNotifier()
         self.logger = logging.getLogger(__name__)
+        self.mode = Config.SCHEDULING_MODE
+        self.planner = None
+        self._planner_synced_at = None
+        self._cycle_lock = threading.Lock()
+        if self.mode == 'adaptive':
+            self.planner = AdaptivePlanner(
+                base_hours=Config.SCRAPE_INTERVAL_HOURS,
+                min_hours=Config.ADAPTIVE_MIN_INTERVAL_HOURS,
+                max_hours=Config.ADAPTIVE_MAX_INTERVAL_HOURS
+            )
+        elif self.mode == 'staggered':
+            self.planner = StaggeredPlanner(base_hours=Config.SCRAPE_INTERVAL_HOURS)
         
     def start(self):
-        """Start the scheduler"""
+        """Start the scheduler
+        
+        With PERSIST_SCHEDULER_JOBS, jobs live in the app database and keep
+        their next run times across restarts; runs missed while the app was
+        down are caught up according to SCHEDULER_COALESCE and
+        SCHEDULER_MISFIRE_GRACE_SECONDS.
+        """
+        global _active_scheduler
         try:
-            # Schedule price checks every N hours as configured
-            self.scheduler.add_job(
-                func=self.check_all_prices,
-                trigger=IntervalTrigger(hours=Config.SCRAPE_INTERVAL_HOURS),
-                id='price_check_job',
-                name='Check all product prices',
-                replace_existing=True
-            )
+            if Config.PERSIST_SCHEDULER_JOBS:
+                with self.app.app_context():
+                    engine = db.engine
+                self.scheduler.add_jobstore(SQLAlchemyJobStore(engine=engine), 'default')
             
-            # Schedule daily cleanup at 3 AM
-            self.scheduler.add_job(
-                func=self.cleanup_old_data,
-                trigger='cron',
-                hour=3,
-                minute=0,
-                id='cleanup_job',
-                name='Clean up old price data',
-                replace_existing=True
-            )
+            _active_scheduler = self
+            # Load persisted jobs before deciding which ones to (re)create
+            self.scheduler.start(paused=True)
+            
+            jobs = []
+            if self.planner is not None:
+                # Pick up products as they individually come due
+                jobs.append((
+                    'dispatch_job', run_dispatch, 'Check prices of due products',
+                    IntervalTrigger(seconds=Config.DISPATCH_INTERVAL_SECONDS)
+                ))
+            else:
+                # Schedule price checks every N hours as configured
+                jobs.append((
+                    'price_check_job', run_price_check, 'Check all product prices',
+                    IntervalTrigger(hours=Config.SCRAPE_INTERVAL_HOURS)
+                ))
+                
+                # Finish a cycle interrupted by the last shutdown straight away
+                with self.app.app_context():
+                    since = self._now() - timedelta(hours=Config.SCRAPE_INTERVAL_HOURS)
+                    unfinished = DatabaseManager.get_resumable_run(since)
+                if unfinished:
+                    jobs.append(('resume_run_job', run_price_check, 'Resume interrupted price check', DateTrigger()))
+            
+            # Schedule daily compaction at 3 AM
+            jobs.append(('cleanup_job', run_cleanup, 'Compact old price data', CronTrigger(hour=3, minute=0)))
             
-            self.scheduler.start()
-            self.logger.info(f"Price scheduler started - checking every {Config.SCRAPE_INTERVAL_HOURS} hours")
+            # Repair rolling stats as old prices leave their windows
+            jobs.append((
+                'stats_recompute_job', run_recompute_stats, 'Recompute price statistics',
+                IntervalTrigger(hours=Config.STATS_RECOMPUTE_HOURS)
+            ))
+            
+            self._sync_jobs(jobs)
+            self.scheduler.resume()
+            self.logger.info(
+                f"Price scheduler started in {self.mode} mode - "
+                f"checking every {Config.SCRAPE_INTERVAL_HOURS} hours"
+            )
             
         except Exception as e:
             self.logger.error(f"Failed to start scheduler: {e}")
     
+    def _sync_jobs(self, jobs):
+        """Add or update jobs, keeping the next run time of unchanged ones"""
+        wanted = {job_id for job_id, _, _, _ in jobs}
+        for job in self.scheduler.get_jobs():
+            if job.id not in wanted:
+                # Left over from another scheduling mode
+                job.remove()
+        
+        for job_id, func, name, trigger in jobs:
+            job = self.scheduler.get_job(job_id)
+            if job and str(job.trigger) == str(trigger) and job.func is func:
+                self.logger.info(f"Resuming {job_id}, next run at {job.next_run_time}")
+                continue
+            self.scheduler.add_job(func=func, trigger=trigger, id=job_id, name=name, replace_existing=True)
+    
     def stop(self):
         """Stop the scheduler"""
         try:
             self.scheduler.shutdown()
+            self.price_writer.close()
+            self.scraper.close()
             self.logger.info("Price scheduler stopped")
         except Exception as e:
             self.logger.error(f"Error stopping scheduler: {e}")
     
     def check_all_prices(self):
-        """Check prices for all active products"""
+        """Check prices for all active products
+        
+        Each cycle is a persisted run checkpointed after every batch. An
+        unfinished run from the current interval is resumed where it left
+        off, and products scraped successfully in the last
+        SKIP_SCRAPED_WITHIN_HOURS are skipped, so restarts don't repeat work.
+        """
+        if not self._cycle_lock.acquire(blocking=False):
+            self.logger.info("Price check cycle already running, skipping")
+            return
+        
+        with self.app.app_context():
+            run_id = None
+            try:
+                run = self._begin_run()
+                run_id = run.id
+                pending_ids = DatabaseManager.get_pending_run_items(run_id)
+                self.logger.info(f"Price check run {run_id}: {len(pending_ids)} of {run.total} products to check")
+                
+                batch_size = max(1, Config.SCRAPE_BATCH_SIZE)
+                for start in range(0, len(pending_ids), batch_size):
+                    batch_ids = pending_ids[start:start + batch_size]
+                    products = DatabaseManager.get_products_by_ids(batch_ids)
+                    outcomes = self.check_batch(products)
+                    self.price_writer.flush()
+                    if self.price_writer.pending():
+                        # Don't checkpoint prices that aren't saved yet
+                        raise RuntimeError("Price writes failed")
+                    
+                    # Products deleted since the run started are skipped
+                    statuses = {product_id: 'skipped' for product_id in batch_ids}
+                    statuses.update({
+                        product.id: 'done' if outcomes.get(product.id) else 'failed'
+                        for product in products
+                    })
+                    DatabaseManager.checkpoint_run(run_id, statuses, cursor=batch_ids[-1])
+                
+                DatabaseManager.finish_scrape_run(run_id)
+                self.logger.info(f"Completed price check run {run_id}")
+                
+            except Exception as e:
+                self.logger.error(f"Error in check_all_prices: {e}")
+                if run_id is not None:
+                    try:
+                        db.session.rollback()
+                        DatabaseManager.finish_scrape_run(run_id, 'interrupted')
+                    except Exception as checkpoint_error:
+                        self.logger.error(f"Failed to checkpoint run {run_id}: {checkpoint_error}")
+            finally:
+                self._cycle_lock.release()
+    
+    def _begin_run(self):
+        """Resume an unfinished run from this interval or start a new one"""
+        now = self._now()
+        run = DatabaseManager.get_resumable_run(now - timedelta(hours=Config.SCRAPE_INTERVAL_HOURS))
+        if run:
+            self.logger.info(f"Resuming price check run {run.id} after product {run.cursor}")
+            if run.status != 'running':
+                run.status = 'running'
+                db.session.commit()
+            return run
+        
+        product_ids = [product.id for product in DatabaseManager.get_all_products()]
+        recent_cutoff = now - timedelta(hours=Config.SKIP_SCRAPED_WITHIN_HOURS)
+        skip_ids = [
+            product_id for product_id, state in DatabaseManager.get_scrape_states(product_ids).items()
+            if state.last_success_at and state.last_success_at >= recent_cutoff
+        ]
+        if skip_ids:
+            self.logger.info(f"Skipping {len(skip_ids)} products scraped in the last {Config.SKIP_SCRAPED_WITHIN_HOURS} hours")
+        return DatabaseManager.start_scrape_run(product_ids, skip_ids)
+    
+    def dispatch_due_products(self):
+        """Check prices for products the planner says are due"""
         with self.app.app_context():
             try:
-                products = DatabaseManager.get_all_products()
-                self.logger.info(f"Starting price check for {len(products)} products")
+                now = self._now()
+                if (self._planner_synced_at is None or
+                        now - self._planner_synced_at >= timedelta(minutes=Config.PLANNER_SYNC_MINUTES)):
+                    self.sync_planner(now)
+                
+                due_ids = self.planner.pop_due(now, max(1, Config.SCRAPE_BATCH_SIZE))
+                if not due_ids:
+                    return
+                
+                products = DatabaseManager.get_products_by_ids(due_ids)
+                self.logger.info(f"Checking {len(products)} due products")
+                
+                outcomes = {}
+                try:
+                    outcomes = self.check_batch(products)
+                finally:
+                    self.price_writer.flush()
+                    # Always reschedule, so a failed batch is retried later
+                    recent_prices = DatabaseManager.get_recent_prices(
+                        [product.id for product in products], Config.VOLATILITY_LOOKBACK_DAYS
+                    )
+                    finished_at = self._now()
+                    for product in products:
+                        prices = [price for _, price in recent_prices.get(product.id, [])]
+                        self.planner.record(product, prices, outcomes.get(product.id, False), finished_at)
+                    DatabaseManager.record_scrape_outcomes({}, next_due={
+                        product.id: self.planner.due_at(product.id) for product in products
+                    })
                 
-                for product in products:
+            except Exception as e:
+                self.logger.error(f"Error in dispatch_due_products: {e}")
+    
+    def sync_planner(self, now=None):
+        """Bring the planner up to date with products and recent price history"""
+        now = now or self._now()
+        products = DatabaseManager.get_all_products()
+        recent_prices = DatabaseManager.get_recent_prices(
+            [product.id for product in products], Config.VOLATILITY_LOOKBACK_DAYS
+        )
+        states = DatabaseManager.get_scrape_states([product.id for product in products])
+        self.planner.sync(products, recent_prices, now, states)
+        self._planner_synced_at = now
+    
+    def check_batch(self, products):
+        """Fetch a batch of products concurrently and record their prices
+        
+        Products already being scraped elsewhere (e.g. a manual scrape) are
+        not fetched again; their in-flight result is awaited for up to
+        INFLIGHT_WAIT_SECONDS instead. Each product's result is published
+        to its waiters as soon as it is scraped, not after the whole batch;
+        when someone is waiting, the price is flushed first so they read
+        the updated product row. If that flush fails, the price stays
+        queued for retry and is not yet saved.
+        Prices served from the response cache were already recorded when
+        they were fetched, so they count as checked but are not written
+        again and don't update the scrape markers.
+        Returns a dict of product id to whether the product's price is current.
+        """
+        outcomes = {}
+        cache_hits = set()
+        claimed = {}
+        waiting = []
+        for product in products:
+            call, leader = price_check_flights.begin(product.asin)
+            if leader:
+                claimed.setdefault(product.amazon_url, []).append((product, call))
+            else:
+                waiting.append((product, call))
+        
+        def publish(url, product_info):
+            for product, call in claimed.get(url, []):
+                if call.done.is_set():
+                    continue
+                error = None
+                if product_info and product_info.get('from_cache'):
+                    cache_hits.add(product.id)
+                    outcomes[product.id] = True
+                else:
                     try:
-                        self.check_product_price(product)
-                        # Add delay between requests to avoid being blocked
-                        time.sleep(random.uniform(Config.MIN_SCRAPE_DELAY, Config.MAX_SCRAPE_DELAY))
+                        outcomes[product.id] = self.process_product_info(product, product_info)
                     except Exception as e:
+                        error = e
                         self.logger.error(f"Error checking price for product {product.id}: {e}")
                         if Config.ENABLE_SLACK_NOTIFICATIONS:
                             self.slack_notifier.send_error_alert(product, str(e))
                 
-                self.logger.info("Completed price check cycle")
-                
+                if price_check_flights.release(product.asin, call):
+                    self.price_writer.flush()
+                price_check_flights.finish(product.asin, call, result=product_info, error=error)
+        
+        try:
+            if claimed:
+                self.scraper.scrape_many(list(claimed), on_result=publish)
+        finally:
+            # Never leave other callers waiting on a failed batch
+            for product, call in (entry for entries in claimed.values() for entry in entries):
+                if not call.done.is_set():
+                    price_check_flights.finish(product.asin, call, error=RuntimeError("Batch scrape failed"))
+            
+            self._record_outcomes({
+                product.id: outcomes.get(product.id, False)
+                for entries in claimed.values() for product, _ in entries
+                if product.id not in cache_hits
+            })
+        
+        for product, call in waiting:
+            try:
+                product_info = price_check_flights.wait(call, timeout=Config.INFLIGHT_WAIT_SECONDS)
+                outcomes[product.id] = bool(product_info and product_info.get('price'))
+                self.logger.info(f"Shared in-flight scrape for product {product.id}")
             except Exception as e:
-                self.logger.error(f"Error in check_all_prices: {e}")
+                # Left for the next cycle or dispatch to retry
+                self.logger.error(f"In-flight scrape failed for product {product.id}: {e}")
+        
+        return outcomes
     
-    def check_product_price(self, product):
-        """Check price for a single product"""
+    def process_product_info(self, product, product_info):
+        """Record scraped product info and send any price alerts
+        
+        Returns whether a price was recorded.
+        """
         try:
-            self.logger.info(f"Checking price for: {product.name}")
-            
-            # Scrape current price
-            product_info = self.scraper.scrape_product(product.amazon_url)
-            
             if not product_info or not product_info.get('price'):
                 self.logger.warning(f"Could not scrape price for product {product.id}")
-                return
+                return False
             
             new_price = product_info['price']
             old_price = product.current_price
             
-            # Update price in database
-            DatabaseManager.update_product_price(product.id, new_price)
+            # Queue the price for the next batched write
+            self.price_writer.add(product.id, new_price)
             
             self.logger.info(f"Price updated for {product.name}: ${new_price:.2f}")
             
@@ -115,32 +385,70 @@ class PriceScheduler:
                 if product.target_price and new_price <= product.target_price:
                     self.slack_notifier.send_target_price_alert(product)
             
+            return True
+            
         except Exception as e:
             self.logger.error(f"Error checking product {product.id}: {e}")
             raise
     
     def cleanup_old_data(self):
-        """Clean up old price history data (keep last 90 days)"""
+        """Compact price history into rollups, archive cold raw data and expire old data
+        
+        Deletes run in chunks within RETENTION_TIME_BUDGET_SECONDS; whatever
+        is left over is picked up by the next cleanup.
+        """
         with self.app.app_context():
             try:
-                from database.models import PriceHistory, get_est_now
-                
-                cutoff_date = get_est_now() - timedelta(days=90)
+                deadline = deadline_after(Config.RETENTION_TIME_BUDGET_SECONDS)
+                result = compact_history(
+                    self._now(),
+                    raw_days=Config.RAW_HISTORY_DAYS,
+                    hourly_days=Config.HOURLY_ROLLUP_DAYS,
+                    deadline=deadline
+                )
                 
-                old_entries = PriceHistory.query.filter(
-                    PriceHistory.timestamp < cutoff_date
-                ).delete()
+                self.logger.info(
+                    f"Compacted price history: {result['hourly_buckets']} hourly and "
+                    f"{result['daily_buckets']} daily buckets, removed {result['raw_deleted']} "
+                    f"raw entries and {result['hourly_deleted']} hourly buckets"
+                )
+                if not result['complete']:
+                    self.logger.info("Cleanup time budget used up, expiring the rest next run")
                 
-                db.session.commit()
+                archive = get_price_archive()
+                if archive is not None and not past_deadline(deadline):
+                    now = self._now()
+                    # Only archive prices already rolled up
+                    archive_before = min(now - timedelta(days=Config.ARCHIVE_AFTER_DAYS), hour_start(now))
+                    exported = archive_cold_history(archive, archive_before)
+                    expired = archive.expire(now - timedelta(days=Config.RAW_HISTORY_DAYS))
+                    self.logger.info(
+                        f"Archived {exported['archived']} prices from {exported['deleted']} history entries, "
+                        f"expired {expired} archived prices"
+                    )
                 
-                self.logger.info(f"Cleaned up {old_entries} old price history entries")
+                old_runs = DatabaseManager.delete_old_runs(days=7, deadline=deadline)
+                if old_runs:
+                    self.logger.info(f"Cleaned up {old_runs} old price check runs")
                 
             except Exception as e:
+                db.session.rollback()
                 self.logger.error(f"Error during cleanup: {e}")
     
+    def recompute_stats(self):
+        """Rebuild every product's rolling price statistics from history"""
+        with self.app.app_context():
+            try:
+                count = DatabaseManager.recompute_product_stats()
+                self.logger.info(f"Recomputed price statistics for {count} products")
+            except Exception as e:
+                db.session.rollback()
+                self.logger.error(f"Error recomputing price statistics: {e}")
+    
     def get_scheduler_status(self):
         """Get current scheduler status"""
-        return {
+        status = {
+            'mode': self.mode,
             'running': self.scheduler.running if self.scheduler else False,
             'jobs': [
                 {
@@ -151,3 +459,28 @@ class PriceScheduler:
                 for job in self.scheduler.get_jobs()
             ] if self.scheduler else []
         }
+        if self.planner is None:
+            with self.app.app_context():
+                run = DatabaseManager.get_latest_run()
+                if run:
+                    status['last_run'] = run.to_dict()
+                    status['last_run']['progress'] = DatabaseManager.get_run_progress(run.id)
+        else:
+            status['tracked_products'] = len(self.planner)
+            status['next_due'] = [
+                {'product_id': product_id, 'due_at': due.isoformat()}
+                for due, product_id in self.planner.next_due()
+            ]
+        return status
+    
+    def _record_outcomes(self, outcomes):
+        try:
+            DatabaseManager.record_scrape_outcomes(outcomes, scraped_at=self._now())
+        except Exception as e:
+            db.session.rollback()
+            self.logger.error(f"Failed to save scrape markers: {e}")
+    
+    @staticmethod
+    def _now():
+        # Naive EST, matching timestamps read back from the database
+        return get_est_now().replace(tzinfo=None)
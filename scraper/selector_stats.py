@@ -0,0 +1,164 @@
+import atexit
+import json
+import logging
+import os
+import threading
+
+
+class SelectorStats:
+    """Hit/miss counters per field and selector, used to order selector lists
+
+    Selectors are tried in order of their smoothed hit rate, so the one most
+    likely to succeed runs first; ties keep the original list order. Counts
+    are persisted to a JSON file and merged with what other processes have
+    written there.
+    """
+
+    def __init__(self, path=None, save_every=50):
+        self.path = path
+        self.save_every = save_every
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._totals = self._empty()
+        self._pending = self._empty()
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self._add(self._totals, json.load(f))
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Could not load selector stats from {path}: {e}")
+
+    def ordered(self, field, selectors, pinned=()):
+        """Get selectors sorted by how likely they are to succeed for a field
+
+        Selectors in `pinned` come first, in their original order.
+        """
+        first = [selector for selector in selectors if selector in pinned]
+        rest = [selector for selector in selectors if selector not in pinned]
+        with self._lock:
+            counts = self._totals['fields'].get(field, {})
+            rates = {}
+            for selector in rest:
+                hits, misses = counts.get(selector, (0, 0))
+                rates[selector] = (hits + 1) / (hits + misses + 2)
+        return first + sorted(rest, key=lambda selector: -rates[selector])
+
+    def record(self, field, selector, hit):
+        """Record whether a selector produced a value for a field"""
+        with self._lock:
+            for counts in (self._totals, self._pending):
+                selector_counts = counts['fields'].setdefault(field, {}).setdefault(selector, [0, 0])
+                selector_counts[0 if hit else 1] += 1
+                counts['evaluations'] += 1
+
+    def record_page(self):
+        """Record that a page has been fully extracted"""
+        with self._lock:
+            self._totals['pages'] += 1
+            self._pending['pages'] += 1
+        self._save_if_due()
+
+    def drain(self):
+        """Take the counts recorded since the last save or drain"""
+        with self._lock:
+            pending, self._pending = self._pending, self._empty()
+        return pending
+
+    def merge(self, counts):
+        """Add counts recorded elsewhere, e.g. by a parser worker process"""
+        with self._lock:
+            self._add(self._totals, counts)
+            self._add(self._pending, counts)
+        self._save_if_due()
+
+    def counts(self):
+        """Get a copy of all counts, in the form accepted by merge"""
+        with self._lock:
+            return json.loads(json.dumps(self._totals))
+
+    def save(self):
+        """Merge pending counts into the stats file"""
+        if not self.path:
+            return
+        pending = self.drain()
+        try:
+            on_disk = self._empty()
+            if os.path.exists(self.path):
+                with open(self.path, encoding='utf-8') as f:
+                    self._add(on_disk, json.load(f))
+            self._add(on_disk, pending)
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(on_disk, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+            with self._lock:
+                self._totals = on_disk
+                self._add(self._totals, self._pending)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not save selector stats to {self.path}: {e}")
+            # Keep the counts for the next save
+            with self._lock:
+                self._add(self._pending, pending)
+
+    def snapshot(self):
+        """Get counters for inspection, with selectors in their current order"""
+        totals = self.counts()
+
+        fields = {}
+        for field, counts in totals['fields'].items():
+            fields[field] = [
+                {
+                    'selector': selector,
+                    'hits': counts[selector][0],
+                    'misses': counts[selector][1],
+                    'hit_rate': counts[selector][0] / max(1, sum(counts[selector]))
+                }
+                for selector in self.ordered(field, list(counts))
+            ]
+
+        pages = totals['pages']
+        return {
+            'pages': pages,
+            'evaluations': totals['evaluations'],
+            'avg_evaluations_per_page': totals['evaluations'] / pages if pages else 0,
+            'fields': fields
+        }
+
+    def _save_if_due(self):
+        with self._lock:
+            due = self.path and self._pending['pages'] >= self.save_every
+        if due:
+            self.save()
+
+    @staticmethod
+    def _empty():
+        return {'pages': 0, 'evaluations': 0, 'fields': {}}
+
+    @staticmethod
+    def _add(target, counts):
+        target['pages'] += counts.get('pages', 0)
+        target['evaluations'] += counts.get('evaluations', 0)
+        for field, selectors in counts.get('fields', {}).items():
+            target_field = target['fields'].setdefault(field, {})
+            for selector, (hits, misses) in selectors.items():
+                target_counts = target_field.setdefault(selector, [0, 0])
+                target_counts[0] += hits
+                target_counts[1] += misses
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def get_selector_stats(path, save_every=50):
+    """Get the process-wide SelectorStats for a stats file"""
+    with _shared_lock:
+        if path not in _shared:
+            _shared[path] = SelectorStats(path, save_every=save_every)
+            atexit.register(_shared[path].save)
+        return _shared[path]
@@ -0,0 +1,93 @@
+import threading
+
+
+class _Call:
+    """A scrape in flight and, once done, its outcome"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # Callers that joined instead of leading
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent work on the same key into a single call
+
+    The first caller for a key (the leader) does the work; callers arriving
+    while it is in flight wait and share its result instead of repeating
+    it. Keys are released as soon as the leader finishes.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key):
+        """Join or start the call for a key, returning (call, is_leader)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            return call, True
+
+    def release(self, key, call):
+        """Stop new callers joining a call, returning whether any are waiting on it
+
+        Lets the leader finish work its waiters depend on (e.g. saving a
+        price) only when someone will read it, before calling finish.
+        """
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            return call.waiters > 0
+
+    def finish(self, key, call, result=None, error=None):
+        """Publish the leader's outcome and release the key"""
+        call.result = result
+        call.error = error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.done.set()
+
+    def wait(self, call, timeout=None):
+        """Wait for a call led by someone else and return its result"""
+        if not call.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for in-flight scrape")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key, func, timeout=None):
+        """Run func once per key at a time, returning (result, shared)
+
+        A caller that waits more than `timeout` seconds for the call in
+        flight gives up on it and runs func itself.
+        """
+        call, leader = self.begin(key)
+        if not leader:
+            try:
+                return self.wait(call, timeout), True
+            except TimeoutError:
+                return func(), False
+
+        try:
+            result = func()
+        except Exception as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result=result)
+        return result, False
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+
+# Shared by the web app and scheduler, keyed by ASIN
+price_check_flights = SingleFlight()
@@ -47,6 +47,576 @@ def test_scraper():
     except Exception as e:
         print(f"✗ Scraping error: {e}")
 
+def test_parsers():
+    """Test that every parser backend extracts the same fields"""
+    print("\nTesting Parser Backends...")
+    from scraper.parsers import PARSER_BACKENDS, get_parser, parse_product_page
+    
+    sample_html = """
+    <html><body>
+    <span id="productTitle"> Echo Dot (5th Gen) </span>
+    <span class="a-price"><span class="a-offscreen">$49.99</span></span>
+    <img id="landingImage" src="https://m.media-amazon.com/images/I/echo.jpg">
+    <div id="availability"><span> In Stock </span></div>
+    </body></html>
+    """
+    
+    results = {name: get_parser(name).extract_html(sample_html) for name in PARSER_BACKENDS}
+    for name, result in results.items():
+        print(f"{name}: {result}")
+    
+    expected = results['html.parser']
+    assert expected['price'] == 49.99
+    assert all(result == expected for result in results.values())
+    
+    # Fields missing from embedded data are still read from the DOM
+    embedded_html = """
+    <html><body>
+    <span id="productTitle">Echo Dot (5th Gen)</span>
+    <script>{"priceAmount":49.99}</script>
+    <img class="a-dynamic-image" src="https://m.media-amazon.com/images/I/echo.jpg">
+    <span class="a-color-success">In Stock</span>
+    </body></html>
+    """
+    info = parse_product_page(get_parser('html.parser'), embedded_html.encode())
+    assert info == {
+        'name': 'Echo Dot (5th Gen)',
+        'price': 49.99,
+        'image_url': 'https://m.media-amazon.com/images/I/echo.jpg',
+        'availability': 'In Stock'
+    }, info
+    print("✓ All parser backends agree")
+
+def test_selector_stats():
+    """Test that learned selector order counts only looked-up fields and keeps the buy box first"""
+    print("\nTesting Selector Stats...")
+    from scraper.parsers import get_parser, parse_product_page
+    from scraper.selector_stats import SelectorStats
+    
+    stats = SelectorStats()
+    # A carousel price selector that has matched on every page so far
+    stats.merge({'pages': 0, 'evaluations': 0, 'fields': {'price': {'.a-price-whole': [100, 0]}}})
+    parser = get_parser('html.parser', stats=stats)
+    
+    page = b"""
+    <html><body>
+    <span id="productTitle">Echo Dot</span>
+    <div id="carousel"><span class="a-price-whole">9.</span></div>
+    <span id="priceblock_ourprice">$49.99</span>
+    <div id="availability"><span>Temporarily out of stock.</span></div>
+    <img id="landingImage" src="https://m.media-amazon.com/images/I/echo.jpg">
+    </body></html>
+    """
+    assert parser.extract_html(page)['price'] == 49.99
+    counts = stats.counts()['fields']
+    assert counts['price']['#priceblock_ourprice'] == [1, 0]
+    assert counts['price']['.a-price-whole'] == [100, 0]
+    
+    # Fields taken from embedded data don't credit the selectors
+    stats = SelectorStats()
+    parser = get_parser('html.parser', stats=stats)
+    embedded = page.replace(b'<body>', b'<body><script>{"priceAmount":49.99}</script>')
+    info = parse_product_page(parser, embedded.replace(b'Echo Dot', b''))
+    assert info['price'] == 49.99 and info['name'] == ''
+    # Only the missing name was looked up
+    assert stats.counts()['fields'] == {'name': {'#productTitle': [1, 0]}}
+    
+    # Each field takes the first selector that matches, even without a usable value
+    page = b"""
+    <div id="availability"><span>Usually dispatched in 3 weeks</span></div>
+    <span class="a-color-success">In Stock</span>
+    """
+    assert get_parser('html.parser').extract_html(page)['availability'] is None
+    print("✓ Buy-box selectors stay first, hits count only looked-up fields")
+
+def test_streaming_extractor():
+    """Test that streamed pages give the full price wherever a chunk ends"""
+    print("\nTesting Streaming Extractor...")
+    from scraper.parsers import StreamingExtractor
+    
+    pages = [
+        b'<html><head><script>var data = {"priceAmount":49.99,"currency":"USD"};</script></head><body>'
+        b'<span id="productTitle">Echo Dot</span><img id="landingImage" src="https://example.com/echo.jpg">'
+        b'<div id="availability"><span>In Stock</span></div></body></html>',
+        b'<html><head><script type="application/ld+json">{"@type": "Product", "name": "Echo Dot",'
+        b' "image": "https://example.com/echo.jpg", "offers": {"price": "49.99",'
+        b' "availability": "https://schema.org/InStock"}}</script></head><body></body></html>'
+    ]
+    
+    for page in pages:
+        for offset in range(len(page) + 1):
+            extractor = StreamingExtractor()
+            if extractor.feed(page[:offset]):
+                assert extractor.product_info['price'] == 49.99, (offset, extractor.product_info)
+            extractor.feed(page[offset:])
+            assert extractor.complete, (offset, extractor.product_info)
+            assert extractor.product_info['price'] == 49.99, (offset, extractor.product_info)
+    
+    # Byte-at-a-time feeding with a tiny overlap still finds every field
+    StreamingExtractor.OVERLAP, overlap = 64, StreamingExtractor.OVERLAP
+    try:
+        for page in pages:
+            extractor = StreamingExtractor()
+            for index in range(len(page)):
+                extractor.feed(page[index:index + 1])
+            assert extractor.complete and extractor.product_info['price'] == 49.99
+    finally:
+        StreamingExtractor.OVERLAP = overlap
+    print("✓ Streamed prices correct at every chunk boundary")
+
+def test_parse_pool():
+    """Test that worker processes parse pages without booting the app"""
+    print("\nTesting Parse Pool...")
+    import subprocess
+    from scraper.parse_pool import ParsePool
+    
+    pool = ParsePool('html.parser', 1)
+    try:
+        product_info = pool.parse(b'<span id="productTitle">Echo Dot</span><span class="a-offscreen">$49.99</span>')
+    finally:
+        pool.shutdown()
+    assert product_info['price'] == 49.99
+    
+    # Spawned workers import the entry script as __mp_main__; that must not start the app
+    root = os.path.dirname(os.path.abspath(__file__))
+    for entry in ('run_dev.py', 'main.py'):
+        code = (
+            "import runpy, sys\n"
+            f"runpy.run_path({os.path.join(root, entry)!r}, run_name='__mp_main__')\n"
+            "print('app.app' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, timeout=60)
+        print(f"{entry} imported by a worker loads the app: {result.stdout.strip()}")
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == 'False'
+    print("✓ Parser workers start without the app")
+
+def test_rate_limiter():
+    """Test that the rate limiter hands out evenly spaced slots per host"""
+    print("\nTesting Rate Limiter...")
+    from scraper.rate_limiter import RateLimiter
+    
+    limiter = RateLimiter(requests_per_minute=600, burst=2, jitter=0)
+    waits = [limiter.reserve('www.amazon.com') for _ in range(5)]
+    print(f"Waits: {[round(wait, 2) for wait in waits]}")
+    
+    # Two requests go out at once, then one every 0.1 seconds
+    assert waits[0] == 0 and waits[1] == 0
+    assert all(abs(waits[i] - (i - 1) * 0.1) < 0.01 for i in range(2, 5))
+    assert limiter.reserve('www.amazon.de') == 0
+    print("✓ Rate limiter spacing correct")
+
+def test_backend_router():
+    """Test that blocked backends are skipped, probed and shared process-wide"""
+    print("\nTesting Backend Router...")
+    import time
+    from scraper.routing import BackendRouter, get_backend_router
+    
+    router = BackendRouter(['requests', 'selenium'], window=10, min_attempts=3, min_success_rate=0.5, cooldown=0.05)
+    for _ in range(3):
+        router.record('requests', False)
+    assert router.breakers['requests'].is_open
+    assert router.plan() == ['selenium']
+    
+    # Planning doesn't use up the probe; one is let through per cooldown
+    # when the backend is used, and a successful probe closes the circuit
+    time.sleep(0.06)
+    assert router.plan() == ['requests', 'selenium']
+    assert router.plan() == ['requests', 'selenium']
+    assert router.allow('requests')
+    assert not router.allow('requests')
+    assert router.plan() == ['selenium']
+    router.record('requests', True)
+    assert not router.breakers['requests'].is_open
+    
+    # The last backend is always tried, even when every circuit is open
+    for name in router.backends:
+        for _ in range(3):
+            router.record(name, False)
+    assert router.plan() == ['selenium']
+    assert router.allow('selenium')
+    
+    # A batch doesn't fall back to Selenium while only its circuit is open
+    class BlockedFetcher:
+        def fetch_all(self, urls, parse, headers=None, validators=None, on_result=None):
+            for url in urls:
+                on_result(url, None)
+    
+    def selenium(url):
+        raise AssertionError("Selenium used while its circuit is open")
+    
+    url = 'https://www.amazon.com/dp/B09B8V1LZ3'
+    router = BackendRouter(['requests', 'selenium'], window=10, min_attempts=3, min_success_rate=0.5, cooldown=60)
+    for _ in range(3):
+        router.record('selenium', False)
+    scraper = AmazonScraper()
+    scraper.router, scraper.cache = router, None
+    scraper.async_fetcher = BlockedFetcher()
+    scraper.scrape_with_selenium = selenium
+    published = {}
+    assert scraper.scrape_many([url], on_result=published.__setitem__) == {url: None}
+    assert published == {url: None}
+    
+    assert AmazonScraper().router is get_backend_router()
+    print("✓ Circuit breakers open, probe and close as expected")
+
+def test_query_plans():
+    """Test that migrations index every hot query"""
+    print("\nTesting Query Plans...")
+    import tempfile
+    from sqlalchemy import create_engine
+    from database.migrations import migrate, check_query_plans
+    
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'plans.db')}")
+        migrate(engine)
+        with engine.connect() as connection:
+            problems = check_query_plans(connection)
+        # Without the history index, the real ORM statements scan the table
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX ix_price_history_product_timestamp")
+        engine.dispose()
+        with engine.connect() as connection:
+            unindexed = dict(check_query_plans(connection))
+        engine.dispose()
+    
+    for name, detail in problems:
+        print(f"{name}: {detail}")
+    assert not problems
+    assert unindexed.get('recent prices') == 'SCAN price_history', unindexed
+
+def _make_app(directory):
+    """Create a bare app on a fresh, migrated database in `directory`"""
+    from flask import Flask
+    from database.models import db
+    from database.migrations import migrate
+    
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(directory, 'test.db')}"
+    db.init_app(app)
+    with app.app_context():
+        migrate(db.engine)
+    return app
+
+def test_price_series():
+    """Test that long-range series cover prices before and after compaction"""
+    print("\nTesting Price Series...")
+    import tempfile
+    from datetime import timedelta
+    from database.models import db, get_est_now
+    from database.db_manager import DatabaseManager, _naive
+    from database.rollups import compact_history
+    
+    with tempfile.TemporaryDirectory() as directory:
+        app = _make_app(directory)
+        with app.app_context():
+            product = DatabaseManager.add_product('Echo Dot', 'https://www.amazon.com/dp/B09B8V1LZ3', 'B09B8V1LZ3')
+            now = _naive(get_est_now())
+            DatabaseManager.record_prices([
+                (product.id, 40.0 + step % 5, now - timedelta(hours=6 * step)) for step in range(150 * 4, 0, -1)
+            ])
+            
+            # A fresh database has no rollups yet, but long windows still see every price
+            for days, resolution in ((200, 'hourly'), (400, 'daily')):
+                series_resolution, series = DatabaseManager.get_price_series(product.id, days)
+                print(f"{days} days before compaction: {series_resolution}, {len(series)} points")
+                assert series_resolution == resolution
+                assert sum(point['count'] for point in series) == 600
+            
+            # After compaction, prices newer than the rollups are still included
+            compact_history(now, raw_days=90, hourly_days=365)
+            DatabaseManager.record_prices([(product.id, 39.0, now)])
+            for days in (200, 400):
+                _, series = DatabaseManager.get_price_series(product.id, days)
+                print(f"{days} days after compaction: {len(series)} points")
+                assert sum(point['count'] for point in series) == 601
+                assert series[0]['close'] == 39.0
+            db.engine.dispose()
+    print("✓ Price series complete at every resolution")
+
+def test_run_compaction():
+    """Test that runs extended after compaction are rolled up once per scrape"""
+    print("\nTesting Run Compaction...")
+    import tempfile
+    from datetime import timedelta
+    from database.models import db, get_est_now, PriceRollupHourly
+    from database.db_manager import DatabaseManager, _naive
+    from database.rollups import compact_history, hour_start
+    
+    history_mode = Config.PRICE_HISTORY_MODE
+    Config.PRICE_HISTORY_MODE = 'changes'
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            app = _make_app(directory)
+            with app.app_context():
+                echo = DatabaseManager.add_product('Echo Dot', 'https://www.amazon.com/dp/B09B8V1LZ3', 'B09B8V1LZ3')
+                kindle = DatabaseManager.add_product('Kindle', 'https://www.amazon.com/dp/B08N5WRWNW', 'B08N5WRWNW')
+                start = hour_start(_naive(get_est_now())) - timedelta(days=3)
+                
+                def scrape(product, hours):
+                    DatabaseManager.record_prices([(product.id, 49.99, start + timedelta(hours=hours))])
+                
+                def rolled_up(product):
+                    return db.session.execute(
+                        db.select(db.func.sum(PriceRollupHourly.price_count))
+                        .where(PriceRollupHourly.product_id == product.id)
+                    ).scalar()
+                
+                for hours in range(11):
+                    scrape(echo, hours)
+                compact_history(start + timedelta(hours=12))
+                # The run is extended, and rebuilt from the watermark
+                scrape(echo, 30)
+                compact_history(start + timedelta(hours=32))
+                assert rolled_up(echo) == 12, rolled_up(echo)
+                
+                # A run last seen before another product's newer bucket is closed
+                scrape(kindle, 40)
+                scrape(kindle, 41)
+                scrape(echo, 45)
+                compact_history(start + timedelta(hours=46))
+                scrape(kindle, 50)
+                compact_history(start + timedelta(hours=52))
+                assert rolled_up(echo) == 13 and rolled_up(kindle) == 3
+                
+                # History shows only real scrape times
+                history = DatabaseManager.get_price_history(echo.id, days=5)
+                assert [(entry.timestamp, entry.observations) for entry in history] == [
+                    (start + timedelta(hours=45), 12), (start, 1)
+                ]
+                history = DatabaseManager.get_price_history(kindle.id, days=5)
+                assert [entry.timestamp for entry in history] == [
+                    start + timedelta(hours=50), start + timedelta(hours=41), start + timedelta(hours=40)
+                ]
+                db.engine.dispose()
+    finally:
+        Config.PRICE_HISTORY_MODE = history_mode
+    print("✓ Compacted runs counted once per scrape")
+
+def test_stats_recompute():
+    """Test that recomputing stats empties windows of products with no history left"""
+    print("\nTesting Stats Recompute...")
+    import tempfile
+    from datetime import timedelta
+    from database.models import db, get_est_now, PriceHistory, ProductStats
+    from database.db_manager import DatabaseManager, _naive
+    
+    with tempfile.TemporaryDirectory() as directory:
+        app = _make_app(directory)
+        with app.app_context():
+            product = DatabaseManager.add_product('Echo Dot', 'https://www.amazon.com/dp/B09B8V1LZ3', 'B09B8V1LZ3')
+            now = _naive(get_est_now())
+            DatabaseManager.record_prices([(product.id, 49.99, now - timedelta(days=10)), (product.id, 44.99, now)])
+            assert DatabaseManager.get_price_statistics(product.id, 30)['price_points'] == 2
+            
+            # Compaction removed every raw price
+            PriceHistory.query.delete()
+            db.session.commit()
+            DatabaseManager.recompute_product_stats()
+            
+            stats = db.session.get(ProductStats, product.id)
+            assert stats.window(30) == (None, None, 0, 0, None) and stats.window(90) == (None, None, 0, 0, None)
+            assert stats.last_price == 44.99 and stats.all_time_low == 44.99
+            assert DatabaseManager.get_price_statistics(product.id, 30) is None
+            db.engine.dispose()
+    print("✓ Stale stats windows reset")
+
+def test_single_flight():
+    """Test that concurrent scrapes of one product share a single call"""
+    print("\nTesting Single Flight...")
+    import tempfile
+    import threading
+    from database.models import db
+    from database.db_manager import DatabaseManager
+    from scraper.scheduler import PriceScheduler
+    from scraper.single_flight import SingleFlight, price_check_flights
+    
+    flights = SingleFlight()
+    call, leader = flights.begin('B09B8V1LZ3')
+    joined, joined_leader = flights.begin('B09B8V1LZ3')
+    assert leader and not joined_leader and joined is call
+    assert flights.begin('B0OTHER000')[1]
+    
+    waiter_results = []
+    waiter = threading.Thread(target=lambda: waiter_results.append(flights.wait(joined, timeout=5)))
+    waiter.start()
+    flights.finish('B09B8V1LZ3', call, result={'price': 49.99})
+    waiter.join()
+    assert waiter_results == [{'price': 49.99}]
+    assert not flights.in_flight('B09B8V1LZ3')
+    
+    # Errors reach every waiter
+    call, _ = flights.begin('B09B8V1LZ3')
+    flights.finish('B09B8V1LZ3', call, error=ValueError('blocked'))
+    try:
+        flights.wait(call)
+        assert False, "expected the leader's error"
+    except ValueError:
+        pass
+    
+    # Concurrent do() calls run the work once
+    started, release, calls = threading.Event(), threading.Event(), []
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'page'
+    outcomes = []
+    threads = [threading.Thread(target=lambda: outcomes.append(flights.do('key', work))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while len([thread for thread in threads if thread.is_alive()]) < 4:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and sorted(outcomes) == [('page', False)] + [('page', True)] * 3
+    
+    # A waiter that gives up runs the work itself
+    call, _ = flights.begin('slow')
+    assert flights.do('slow', lambda: 'own page', timeout=0.01) == ('own page', False)
+    flights.finish('slow', call, result='page')
+    
+    # Callers waiting on a scheduler batch get each product as soon as it is written
+    with tempfile.TemporaryDirectory() as directory:
+        app = _make_app(directory)
+        with app.app_context():
+            echo = DatabaseManager.add_product('Echo Dot', 'https://www.amazon.com/dp/B09B8V1LZ3', 'B09B8V1LZ3')
+            kindle = DatabaseManager.add_product('Kindle', 'https://www.amazon.com/dp/B08N5WRWNW', 'B08N5WRWNW')
+            echo_id = echo.id
+            scheduler = PriceScheduler(app)
+            seen = []
+            joined = threading.Event()
+            
+            def read_shared_result():
+                call, leader = price_check_flights.begin(echo.asin)
+                joined.set()
+                assert not leader
+                price_check_flights.wait(call, timeout=5)
+                with app.app_context():
+                    seen.append(DatabaseManager.get_product_by_id(echo_id).current_price)
+            
+            reader = threading.Thread(target=read_shared_result)
+            def scrape_many(urls, on_result):
+                # Another caller joins the scrape while it is in flight
+                reader.start()
+                joined.wait(5)
+                on_result(echo.amazon_url, {'price': 39.99, 'name': 'Echo Dot'})
+                # The waiter is released before the rest of the batch is scraped
+                reader.join(5)
+                assert seen == [39.99], seen
+                on_result(kindle.amazon_url, None)
+            
+            scheduler.scraper.scrape_many = scrape_many
+            assert scheduler.check_batch([echo, kindle]) == {echo_id: True, kindle.id: False}
+            assert not price_check_flights.in_flight(kindle.asin)
+            scheduler.price_writer.close()
+            db.engine.dispose()
+        assert seen == [39.99], seen
+    print("✓ In-flight scrapes shared, each result published once its price is written")
+
+def test_scrape_many_cache():
+    """Test that scrapes revalidate stale pages and flag cache hits so they aren't re-recorded"""
+    print("\nTesting Batch Scrape Cache...")
+    import os
+    import tempfile
+    from database.models import db, PriceHistory
+    from database.db_manager import DatabaseManager
+    from scraper.async_fetcher import NOT_MODIFIED
+    from scraper.http_cache import ResponseCache
+    from scraper.routing import BackendRouter
+    from scraper.scheduler import PriceScheduler
+    
+    fresh_url = 'https://www.amazon.com/dp/B09B8V1LZ3'
+    stale_url = 'https://www.amazon.com/dp/B08N5WRWNW'
+    
+    class FakeFetcher:
+        def fetch_all(self, urls, parse, headers=None, validators=None, on_result=None):
+            self.headers = headers
+            for url in urls:
+                on_result(url, NOT_MODIFIED)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        app = _make_app(directory)
+        with app.app_context():
+            product = DatabaseManager.add_product('Echo Dot', fresh_url, 'B09B8V1LZ3')
+            scheduler = PriceScheduler(app)
+            scraper = scheduler.scraper
+            scraper.router = BackendRouter(['requests', 'selenium'])
+            scraper.async_fetcher = FakeFetcher()
+            scraper.cache = ResponseCache(os.path.join(directory, 'cache.db'), ttl=900)
+            scraper.cache.put('asin:B09B8V1LZ3', fresh_url, {'price': 39.99})
+            scraper.cache.put('asin:B08N5WRWNW', stale_url, {'price': 24.99}, {'ETag': '"v1"'})
+            scraper.cache._conn.execute(
+                "UPDATE response_cache SET fetched_at = fetched_at - 1000 WHERE key = 'asin:B08N5WRWNW'"
+            )
+            
+            results = scraper.scrape_many([fresh_url, stale_url])
+            assert results[fresh_url] == {'price': 39.99, 'from_cache': True}
+            assert scraper.scrape_product(fresh_url) == {'price': 39.99, 'from_cache': True}
+            assert scraper.async_fetcher.headers == {stale_url: {'If-None-Match': '"v1"'}}
+            assert results[stale_url] == {'price': 24.99}
+            assert scraper.cache.get('asin:B08N5WRWNW')['fresh']
+            
+            # A cache hit is a checked product but not a new price
+            assert scheduler.check_batch([product]) == {product.id: True}
+            assert PriceHistory.query.count() == 0
+            assert product.id not in DatabaseManager.get_scrape_states([product.id])
+            scheduler.price_writer.close()
+            db.engine.dispose()
+    print("✓ Stale pages revalidated, cache hits not recorded as new prices")
+
+def test_scrape_run_resume():
+    """Test that an interrupted price check run resumes after its last checkpoint"""
+    print("\nTesting Scrape Run Resume...")
+    import tempfile
+    from database.models import db, ScrapeRun
+    from database.db_manager import DatabaseManager
+    from scraper.scheduler import PriceScheduler
+    
+    batch_size = Config.SCRAPE_BATCH_SIZE
+    Config.SCRAPE_BATCH_SIZE = 2
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            app = _make_app(directory)
+            with app.app_context():
+                product_ids = [
+                    DatabaseManager.add_product(f'Product {index}', f'https://www.amazon.com/dp/B00000000{index}',
+                                                f'B00000000{index}').id
+                    for index in range(5)
+                ]
+                scheduler = PriceScheduler(app)
+                checked = []
+                crashes = ['Scraper crashed']
+                
+                def check_batch(products):
+                    # The second batch of the first cycle fails
+                    if checked and crashes:
+                        raise RuntimeError(crashes.pop())
+                    checked.extend(product.id for product in products)
+                    return {product.id: True for product in products}
+                
+                scheduler.check_batch = check_batch
+                scheduler.check_all_prices()
+                run = db.session.execute(db.select(ScrapeRun)).scalar_one()
+                assert run.status == 'interrupted' and run.cursor == product_ids[1]
+                assert DatabaseManager.get_run_progress(run.id) == {'done': 2, 'pending': 3}
+                
+                # The next cycle picks up the same run after the checkpoint
+                scheduler.check_all_prices()
+                db.session.expire_all()
+                assert checked == product_ids, checked
+                assert db.session.execute(db.select(db.func.count(ScrapeRun.id))).scalar() == 1
+                assert run.status == 'completed' and run.cursor == product_ids[-1]
+                assert DatabaseManager.get_run_progress(run.id) == {'done': 5}
+                scheduler.price_writer.close()
+                db.engine.dispose()
+    finally:
+        Config.SCRAPE_BATCH_SIZE = batch_size
+    print("✓ Interrupted run resumed from its checkpoint")
+
 def test_slack():
     """Test Slack notifications"""
     print("\nTesting Slack Notifications...")
@@ -79,6 +649,19 @@ def main():
     print("=" * 40)
     
     test_config()
+    test_parsers()
+    test_selector_stats()
+    test_streaming_extractor()
+    test_parse_pool()
+    test_rate_limiter()
+    test_backend_router()
+    test_query_plans()
+    test_price_series()
+    test_run_compaction()
+    test_stats_recompute()
+    test_single_flight()
+    test_scrape_many_cache()
+    test_scrape_run_resume()
     test_scraper()
     test_slack()
     